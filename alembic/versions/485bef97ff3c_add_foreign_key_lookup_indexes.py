@@ -0,0 +1,44 @@
+"""add foreign key lookup indexes
+
+Revision ID: 485bef97ff3c
+Revises: b61650044bed
+Create Date: 2026-10-19 14:21:05.662190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '485bef97ff3c'
+down_revision: Union[str, Sequence[str], None] = 'b61650044bed'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, column) for foreign keys the routers filter or join on
+INDEXES = [
+    ('ix_item_images_item_id', 'item_images', 'item_id'),
+    ('ix_item_borrowing_requests_item_id', 'item_borrowing_requests', 'item_id'),
+    ('ix_item_borrowing_requests_borrower_id', 'item_borrowing_requests', 'borrower_id'),
+    ('ix_item_borrowing_transactions_item_borrowing_request_id', 'item_borrowing_transactions', 'item_borrowing_request_id'),
+    ('ix_item_borrowing_transactions_operator_id', 'item_borrowing_transactions', 'operator_id'),
+    # the primary key is (user_id, club_id), so it can't serve lookups by club
+    ('ix_memberships_club_id', 'memberships', 'club_id'),
+    ('ix_logging_who', 'logging', 'who'),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the tables writable while building, but can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, column in INDEXES:
+            op.create_index(name, table, [column], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _column in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
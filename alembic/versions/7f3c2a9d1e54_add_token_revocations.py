@@ -0,0 +1,42 @@
+"""add token revocations and membership version
+
+Revision ID: 7f3c2a9d1e54
+Revises: 485bef97ff3c
+Create Date: 2026-10-19 15:02:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3c2a9d1e54'
+down_revision: Union[str, Sequence[str], None] = '485bef97ff3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # a constant default, so adding the column doesn't rewrite the table
+    op.add_column('users', sa.Column('membership_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+    op.create_table(
+        'token_revocations',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('jti', sa.String(length=64), nullable=True),
+        sa.Column('revoked_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.UniqueConstraint('jti'),
+    )
+    op.create_index('ix_token_revocations_revoked_at', 'token_revocations', ['revoked_at'], unique=False)
+    op.create_index('ix_token_revocations_expires_at', 'token_revocations', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_token_revocations_expires_at', table_name='token_revocations')
+    op.drop_index('ix_token_revocations_revoked_at', table_name='token_revocations')
+    op.drop_table('token_revocations')
+    op.drop_column('users', 'membership_version')
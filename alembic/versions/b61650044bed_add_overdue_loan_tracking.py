@@ -0,0 +1,70 @@
+"""add overdue loan tracking
+
+Revision ID: b61650044bed
+Revises: 0c49bccbb156
+Create Date: 2026-10-19 13:02:17.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61650044bed'
+down_revision: Union[str, Sequence[str], None] = '0c49bccbb156'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('item_borrowing_requests', sa.Column('returned_at', sa.TIMESTAMP(timezone=True), nullable=True))
+
+    # a loan is closed by its first return transaction
+    op.execute("""
+        UPDATE item_borrowing_requests r
+        SET returned_at = t.returned_at
+        FROM (
+            SELECT item_borrowing_request_id, MIN(processed_at) AS returned_at
+            FROM item_borrowing_transactions
+            WHERE status IN ('PENDING_CONDITION_CHECK', 'COMPLETED', 'REJECTED')
+            GROUP BY item_borrowing_request_id
+        ) t
+        WHERE t.item_borrowing_request_id = r.id;
+    """)
+
+    op.create_index(
+        'ix_item_borrowing_requests_open_return_date',
+        'item_borrowing_requests',
+        ['return_date', 'id'],
+        unique=False,
+        postgresql_where=sa.text('returned_at IS NULL'),
+    )
+
+    op.create_table(
+        'overdue_loans',
+        sa.Column('id', sa.Integer(), primary_key=True, nullable=False),
+        sa.Column('item_borrowing_request_id', sa.Integer(), sa.ForeignKey('item_borrowing_requests.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('club_id', sa.Integer(), sa.ForeignKey('clubs.id', ondelete='CASCADE'), nullable=True),
+        sa.Column('return_date', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('detected_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.UniqueConstraint('item_borrowing_request_id'),
+    )
+    op.create_index('ix_overdue_loans_club_id_return_date', 'overdue_loans', ['club_id', 'return_date'], unique=False)
+
+    op.create_table(
+        'job_checkpoints',
+        sa.Column('name', sa.String(), primary_key=True, nullable=False),
+        sa.Column('checkpoint_at', sa.TIMESTAMP(timezone=True), nullable=True),
+        sa.Column('checkpoint_id', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_checkpoints')
+    op.drop_index('ix_overdue_loans_club_id_return_date', table_name='overdue_loans')
+    op.drop_table('overdue_loans')
+    op.drop_index('ix_item_borrowing_requests_open_return_date', table_name='item_borrowing_requests')
+    op.drop_column('item_borrowing_requests', 'returned_at')
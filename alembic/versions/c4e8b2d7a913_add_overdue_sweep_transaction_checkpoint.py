@@ -0,0 +1,36 @@
+"""add overdue sweep transaction checkpoint
+
+Revision ID: c4e8b2d7a913
+Revises: 7f3c2a9d1e54
+Create Date: 2026-10-19 16:21:08.417350
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8b2d7a913'
+down_revision: Union[str, Sequence[str], None] = '7f3c2a9d1e54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('job_checkpoints', sa.Column('checkpoint_transaction_id', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+    # requests that were never approved were never handed over, they can't be overdue
+    op.execute("""
+        DELETE FROM overdue_loans o
+        WHERE NOT EXISTS (
+            SELECT 1 FROM item_borrowing_transactions t
+            WHERE t.item_borrowing_request_id = o.item_borrowing_request_id
+              AND t.status = 'APPROVED'
+        );
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('job_checkpoints', 'checkpoint_transaction_id')
@@ -0,0 +1,73 @@
+import threading
+from cachetools import TTLCache
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from .. import models
+from ..config import settings
+
+# Club roles carried in access tokens, so club-scoped role checks don't query memberships.
+# A token holds {club_id: role} for the user's clubs together with the user's
+# membership_version at issue time. Every membership change bumps that version in the same
+# transaction, and a claim is only trusted while the token's version is the current one; a
+# stale token falls back to the memberships query until it is refreshed. The current version
+# is cached per worker for MEMBERSHIP_VERSION_CACHE_SECONDS: the worker making a change sees
+# it at once, the others within that time.
+
+# users in more clubs than this get no claims and always take the query path
+MAX_CLUB_CLAIMS = 32
+
+_versions = TTLCache(maxsize=100_000, ttl=settings.MEMBERSHIP_VERSION_CACHE_SECONDS)
+_lock = threading.Lock()
+
+
+def club_role_claims(db: Session, user_id: int) -> dict[str, int] | None:
+    """The user's roles by club id (JSON object keys), None when there are too many to carry.
+
+    Read the user's membership_version before calling this, so the roles are never older
+    than the version they are issued with.
+    """
+    rows = db.execute(
+        select(models.Membership.club_id, models.Membership.role)
+        .where(models.Membership.user_id == user_id)
+        .limit(MAX_CLUB_CLAIMS + 1)
+    ).all()
+    if len(rows) > MAX_CLUB_CLAIMS:
+        return None
+    return {str(club_id): role for club_id, role in rows}
+
+
+def current_membership_version(db: Session, user_id: int) -> int | None:
+    version = _versions.get(user_id)
+    if version is None:
+        version = db.execute(select(models.User.membership_version).where(models.User.id == user_id)).scalar()
+        if version is not None:
+            with _lock:
+                _versions[user_id] = version
+    return version
+
+
+def bump_membership_version(db: Session, user_id: int):
+    """Marks the club claims in the user's tokens as stale; call in the transaction changing the membership."""
+    version = db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(membership_version=models.User.membership_version + 1)
+        .returning(models.User.membership_version)
+    ).scalar()
+    # before the commit: if it rolls back, tokens are only distrusted until the cache expires
+    if version is not None:
+        with _lock:
+            _versions[user_id] = version
+
+
+def club_role(db: Session, user, club_id: int) -> int | None:
+    """The user's role in the club, None when not a member. From the token's claims while they are current."""
+    claims = getattr(user, "club_roles", None)
+    if claims is not None and current_membership_version(db, user.id) == user.membership_version:
+        return claims.get(str(club_id))
+
+    membership = db.query(models.Membership).filter(
+        models.Membership.user_id == user.id,
+        models.Membership.club_id == club_id
+    ).first()
+    return membership.role if membership else None
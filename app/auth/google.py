@@ -1,6 +1,10 @@
 import requests
+import secrets
+from urllib.parse import urlsplit
 from fastapi import APIRouter, Depends, HTTPException
-from authlib.integrations.starlette_client import OAuth
+from authlib.integrations.starlette_client import OAuth, StarletteOAuth2App
+from authlib.oidc.core import UserInfo
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 from sqlalchemy.orm import Session
 from ..config import settings
@@ -8,6 +12,75 @@ from ..database import get_db
 from ..models import User
 from datetime import datetime, timedelta, timezone
 import jwt
+from . import oidc
+
+# The OAuth `state` sent to Google is a signed, expiring token (SECRET_KEY, OAUTH_STATE_TTL_SECONDS)
+# carrying the frontend URL to return to, so the callback can trust the redirect without any
+# server-side storage. Authlib still keys the nonce by it in the /auth-scoped cookie session
+# (middleware/auth_session.py), which ties the callback to the browser that started the login.
+
+LOGIN_STATE = "login_state"
+
+
+def allowed_redirect(url: str) -> bool:
+    """Whether the frontend URL is on one of the LOGIN_REDIRECT_ORIGINS.
+
+    Separate from ALLOWED_ORIGIN (CORS), which may be *: the tokens are sent to this URL, so
+    there is no wildcard, and nothing is allowed while the list is empty.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return False
+    origins = {origin.strip().rstrip("/").lower() for origin in settings.LOGIN_REDIRECT_ORIGINS.split(",") if origin.strip()}
+    return f"{parts.scheme}://{parts.netloc.lower()}" in origins
+
+
+def create_login_state(redirect: str | None) -> str:
+    now = datetime.now(timezone.utc)
+    payload = {
+        "typ": LOGIN_STATE,
+        "redirect": redirect,
+        # unique per login, Authlib keeps the login's data under the state value
+        "sid": secrets.token_urlsafe(16),
+        "exp": now + timedelta(seconds=settings.OAUTH_STATE_TTL_SECONDS),
+        "iat": now
+    }
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def read_login_state(state: str | None) -> dict:
+    """The claims of a state from create_login_state, raises jwt.PyJWTError when missing, forged or expired."""
+    if not state:
+        raise jwt.InvalidTokenError("Missing state")
+    payload = jwt.decode(
+        state, settings.SECRET_KEY, algorithms=[settings.ALGORITHM], options={"require": ["typ", "sid", "exp"]}
+    )
+    if payload["typ"] != LOGIN_STATE:
+        raise jwt.InvalidTokenError("Not a login state")
+    return payload
+
+
+class CachedOIDCApp(StarletteOAuth2App):
+    """Authlib client that takes the provider metadata and keys from the cache in auth/oidc.py.
+
+    Authlib would load the discovery document once per process and keep it forever, and
+    verify ID tokens with its own copy of the JWKS; here both come from the shared cache,
+    which expires and refreshes them. The only provider call left in a login is the code
+    exchange, the user's profile comes from the verified ID token.
+    """
+
+    async def load_server_metadata(self):
+        self.server_metadata.update(await oidc.load_metadata(oidc.google))
+        return self.server_metadata
+
+    async def parse_id_token(self, token, nonce, claims_options=None, claims_cls=None, leeway=120):
+        # CPU only once the keys are cached, a thread only when they have to be fetched
+        if oidc.google.warm():
+            claims = oidc.google.verify_id_token(token["id_token"], nonce=nonce, leeway=leeway)
+        else:
+            claims = await run_in_threadpool(oidc.google.verify_id_token, token["id_token"], nonce, leeway)
+        return UserInfo(claims)
+
 
 oauth = OAuth()
 
@@ -15,8 +88,8 @@ oauth.register(
     name="google",
     client_id=settings.GOOGLE_CLIENT_ID,
     client_secret=settings.GOOGLE_CLIENT_SECRET,
-    server_metadata_url="https://accounts.google.com/.well-known/openid-configuration",
     client_kwargs={"scope": "openid email profile"},
+    client_cls=CachedOIDCApp,
 )
 
 
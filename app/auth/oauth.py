@@ -1,20 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import uuid
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from ..database import get_db
 from ..config import settings
 from .. import models
+from .revocation import revocations
 import jwt
 from datetime import datetime, timedelta, timezone
 
 security = HTTPBearer()
-    
-def create_jwt(user_id : int):
+
+# Login hands out a pair of tokens. The access token is short-lived (ACCESS_TOKEN_EXPIRE_MINUTES)
+# and carries what the role checks need (global role, club roles and the membership version they
+# belong to, see auth/claims.py), so most requests are authorized from the token alone. The refresh token (REFRESH_TOKEN_EXPIRE_DAYS) only buys a new
+# pair at /auth/refresh, which reads the user again and revokes the used refresh token.
+# Both are checked against the in-memory revocation set (auth/revocation.py).
+# The login redirect never carries a refresh token (URLs end up in browser history, Referer
+# headers and access logs): it carries a one-time login code that /auth/token trades for a
+# pair, revoked on first use like a refresh token.
+
+ACCESS_TOKEN = "access"
+REFRESH_TOKEN = "refresh"
+LOGIN_CODE = "login_code"
+LOGIN_CODE_EXPIRE_SECONDS = 60
+
+
+class TokenRevokedError(jwt.InvalidTokenError):
+    pass
+
+
+class TokenUser:
+    """The caller as described by a verified access token, in place of a models.User row."""
+
+    __slots__ = ("id", "global_role", "membership_version", "club_roles")
+
+    def __init__(self, id: int, global_role: int, membership_version: int, club_roles: dict[str, int] | None = None):
+        self.id = id
+        self.global_role = global_role
+        self.membership_version = membership_version
+        self.club_roles = club_roles
+
+    def __repr__(self):
+        return f"TokenUser(id={self.id}, global_role={self.global_role})"
+
+
+def create_access_token(
+    user_id: int,
+    global_role: int = models.GlobalRoles.USER.value,
+    membership_version: int = 0,
+    club_roles: dict[str, int] | None = None,
+) -> str:
+    now = datetime.now(timezone.utc)
+    payload = {
+        "user_id": str(user_id),
+        "typ": ACCESS_TOKEN,
+        "role": global_role,
+        "mv": membership_version,
+        "exp": now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        # fractional (allowed for NumericDate), compared with the exact time of a revocation
+        "iat": now.timestamp()
+    }
+    if club_roles is not None:
+        payload["clubs"] = club_roles
+    return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+def _single_use_token(user_id: int, token_type: str, lifetime: timedelta) -> str:
+    now = datetime.now(timezone.utc)
     payload = {
         "user_id": str(user_id),
-        "exp": datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-        "iat": datetime.now(timezone.utc)
+        "typ": token_type,
+        "jti": uuid.uuid4().hex,
+        "exp": now + lifetime,
+        # fractional (allowed for NumericDate), compared with the exact time of a revocation
+        "iat": now.timestamp()
     }
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
+def create_refresh_token(user_id: int) -> str:
+    return _single_use_token(user_id, REFRESH_TOKEN, timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+
+
+def create_login_code(user_id: int) -> str:
+    return _single_use_token(user_id, LOGIN_CODE, timedelta(seconds=LOGIN_CODE_EXPIRE_SECONDS))
+
+
+def create_token_pair(user, club_roles: dict[str, int] | None = None) -> dict:
+    """Access and refresh token for a user row (id, global_role, membership_version)."""
+    return {
+        "access_token": create_access_token(user.id, user.global_role, user.membership_version, club_roles),
+        "refresh_token": create_refresh_token(user.id),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def decode_token(token: str, token_type: str = ACCESS_TOKEN) -> dict:
+    """The claims of a valid, unrevoked token of `token_type`, raises jwt.PyJWTError otherwise."""
+    payload = jwt.decode(
+        token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM], options={"require": ["user_id", "exp", "iat"]}
+    )
+    # tokens from before the access/refresh split have no typ and act as access tokens
+    if payload.get("typ", ACCESS_TOKEN) != token_type:
+        raise jwt.InvalidTokenError(f"Expected a {token_type} token")
+    if revocations.is_revoked(int(payload["user_id"]), payload.get("jti"), payload["iat"]):
+        raise TokenRevokedError("Token has been revoked")
+    return payload
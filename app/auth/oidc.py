@@ -0,0 +1,208 @@
+import logging
+import re
+import threading
+import time
+import httpx
+import jwt
+from starlette.concurrency import run_in_threadpool
+from ..config import settings
+from ..utils.metrics import registry
+
+# OpenID Connect provider metadata and signing keys, cached per worker.
+# The discovery document and the JWKS are fetched once and kept for OIDC_CACHE_TTL_SECONDS
+# (or the response's Cache-Control max-age when that is shorter). A daemon thread refreshes
+# them before they expire, so logins never wait on the provider; when a refresh fails the last
+# good copy keeps being served. Concurrent cold-cache callers share a single fetch.
+# ID tokens are verified here with the cached keys (signature, iss, aud, exp, iat, nonce).
+# A token signed with a key id we don't know forces a JWKS refresh (key rotation), at most
+# once per JWKS_MIN_REFRESH_SECONDS so forged key ids can't be used to hammer the provider.
+# OIDC_ISSUER points the login at another provider, e.g. scripts/fake_oidc.py for local testing.
+
+JWKS_MIN_REFRESH_SECONDS = 60
+# retry delay of the background refresh after a failed fetch
+RETRY_SECONDS = 60
+# the refresher renews entries when this fraction of their lifetime has passed
+REFRESH_AT = 0.8
+# Google also issues ID tokens with the scheme-less issuer
+ISSUER_ALIASES = {"https://accounts.google.com": ("accounts.google.com",)}
+# asymmetric algorithms only, HS* would need the client secret as the key
+SUPPORTED_ALGORITHMS = ("RS256", "RS384", "RS512", "PS256", "PS384", "PS512", "ES256", "ES384", "ES512")
+
+oidc_fetches = registry.counter(
+    "oidc_fetches_total", "Fetches of the OIDC discovery document and JWKS", ("document", "result")
+)
+
+logger = logging.getLogger(__name__)
+
+_max_age = re.compile(r"max-age=(\d+)")
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "expires_at")
+
+    def __init__(self, value, ttl: float):
+        self.value = value
+        self.fetched_at = time.monotonic()
+        self.expires_at = self.fetched_at + ttl
+
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+
+class OIDCProvider:
+    def __init__(self, issuer: str, client_id: str, ttl: int = settings.OIDC_CACHE_TTL_SECONDS, timeout: float = 5.0):
+        self.issuer = issuer.rstrip("/")
+        self.client_id = client_id
+        self.ttl = ttl
+        self.timeout = timeout
+        self._metadata: _Entry | None = None
+        self._jwks: _Entry | None = None
+        # reentrant: a JWKS fetch reads the metadata, which may have to be fetched first
+        self._lock = threading.RLock()
+
+    @property
+    def discovery_url(self) -> str:
+        return f"{self.issuer}/.well-known/openid-configuration"
+
+    def fresh_metadata(self) -> dict | None:
+        """The cached discovery document if it is still fresh, never fetches."""
+        entry = self._metadata
+        return entry.value if entry is not None and entry.fresh() else None
+
+    def warm(self) -> bool:
+        """Whether both documents are cached and fresh, i.e. verifying a token won't fetch."""
+        return all(entry is not None and entry.fresh() for entry in (self._metadata, self._jwks))
+
+    def metadata(self) -> dict:
+        """The provider's discovery document, fetched only when there is no fresh copy."""
+        entry = self._metadata
+        if entry is None or not entry.fresh():
+            entry = self._refresh("metadata", entry)
+        return entry.value
+
+    def signing_keys(self) -> dict[str, jwt.PyJWK]:
+        """The provider's signing keys by key id."""
+        entry = self._jwks
+        if entry is None or not entry.fresh():
+            entry = self._refresh("jwks", entry)
+        return entry.value
+
+    def signing_key(self, kid: str | None) -> jwt.PyJWK:
+        keys = self.signing_keys()
+        if kid in keys:
+            return keys[kid]
+        # rotated keys: refetch, unless the set we have was fetched moments ago
+        if time.monotonic() - self._jwks.fetched_at >= JWKS_MIN_REFRESH_SECONDS:
+            keys = self._refresh("jwks", self._jwks).value
+        if kid not in keys:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid!r}")
+        return keys[kid]
+
+    def verify_id_token(self, id_token: str, nonce: str | None = None, leeway: int = 120) -> dict:
+        """The claims of a valid ID token for this client, raises jwt.InvalidTokenError otherwise."""
+        metadata = self.metadata()
+        algorithms = [alg for alg in metadata.get("id_token_signing_alg_values_supported", ["RS256"]) if alg in SUPPORTED_ALGORITHMS]
+        header = jwt.get_unverified_header(id_token)
+        if header.get("alg") not in algorithms:
+            raise jwt.InvalidAlgorithmError(f"ID token algorithm {header.get('alg')!r} is not allowed")
+
+        issuer = metadata["issuer"]
+        claims = jwt.decode(
+            id_token,
+            self.signing_key(header.get("kid")),
+            algorithms=algorithms,
+            audience=self.client_id,
+            issuer=[issuer, *ISSUER_ALIASES.get(issuer, ())],
+            leeway=leeway,
+            options={"require": ["iss", "aud", "sub", "exp", "iat"]},
+        )
+        if nonce is not None and claims.get("nonce") != nonce:
+            raise jwt.InvalidTokenError("ID token nonce does not match")
+        return claims
+
+    def refresh(self):
+        """Fetches both documents again, regardless of their age."""
+        self._refresh("metadata", self._metadata)
+        self._refresh("jwks", self._jwks)
+
+    def next_refresh_in(self) -> float:
+        """Seconds until the first cached document is due for renewal."""
+        entries = [entry for entry in (self._metadata, self._jwks) if entry is not None]
+        if len(entries) < 2:
+            return 0.0
+        due = min(entry.fetched_at + (entry.expires_at - entry.fetched_at) * REFRESH_AT for entry in entries)
+        return max(0.0, due - time.monotonic())
+
+    def _refresh(self, document: str, seen: _Entry | None) -> _Entry:
+        with self._lock:
+            current = self._metadata if document == "metadata" else self._jwks
+            # someone else refreshed it while we waited for the lock
+            if current is not None and current is not seen and current.fresh():
+                return current
+            try:
+                entry = self._fetch(document)
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                oidc_fetches.inc(document, "error")
+                if current is None:
+                    raise
+                logger.warning("Could not refresh the OIDC %s from %s (%s), keeping the cached copy", document, self.issuer, e)
+                # served stale for a while, not refetched by every login during an outage
+                current.expires_at = time.monotonic() + RETRY_SECONDS
+                return current
+            oidc_fetches.inc(document, "ok")
+            if document == "metadata":
+                self._metadata = entry
+            else:
+                self._jwks = entry
+            return entry
+
+    def _fetch(self, document: str) -> _Entry:
+        url = self.discovery_url if document == "metadata" else self.metadata()["jwks_uri"]
+        response = httpx.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        ttl = self.ttl
+        max_age = _max_age.search(response.headers.get("cache-control", ""))
+        if max_age:
+            ttl = max(min(ttl, int(max_age.group(1))), RETRY_SECONDS)
+
+        if document == "metadata":
+            return _Entry(response.json(), ttl)
+        keys = {}
+        for key in response.json()["keys"]:
+            if key.get("use", "sig") != "sig" or "kid" not in key:
+                continue
+            try:
+                keys[key["kid"]] = jwt.PyJWK(key)
+            except jwt.PyJWKError as e:
+                logger.warning("Skipping OIDC signing key %s (%s)", key["kid"], e)
+        return _Entry(keys, ttl)
+
+
+google = OIDCProvider(settings.OIDC_ISSUER, settings.GOOGLE_CLIENT_ID)
+
+
+async def load_metadata(provider: OIDCProvider) -> dict:
+    """provider.metadata() without blocking the event loop when it has to be fetched."""
+    metadata = provider.fresh_metadata()
+    if metadata is not None:
+        return metadata
+    return await run_in_threadpool(provider.metadata)
+
+
+def run_refresher(provider: OIDCProvider):
+    while True:
+        try:
+            provider.refresh()
+            # nothing due means a refresh failed and stale copies are being served
+            delay = provider.next_refresh_in() or RETRY_SECONDS
+        except Exception:
+            logger.exception("OIDC refresh from %s failed", provider.issuer)
+            delay = RETRY_SECONDS
+        time.sleep(max(delay, 1.0))
+
+
+def start_oidc_refresher(provider: OIDCProvider = google):
+    """Warms the cache and keeps it fresh from a daemon thread."""
+    thread = threading.Thread(target=run_refresher, args=(provider,), name="oidc-refresh", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,150 @@
+import argparse
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from ..logger import setup_logging
+
+# Revoked tokens, checked on every authenticated request without a query.
+# token_revocations is the source of truth; each worker keeps the rows that can still match a
+# live token in two dicts (refresh token jti -> expiry, user id -> revoked-before time) and
+# pulls new rows every TOKEN_REVOCATION_SYNC_SECONDS. A revocation applies at once in the
+# worker that made it and within one sync interval everywhere else, well inside the lifetime
+# of an access token. Rows are read again for SYNC_OVERLAP_SECONDS after they were written, so
+# a transaction that committed late is not skipped.
+
+SYNC_OVERLAP_SECONDS = 60
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationSet:
+    def __init__(self):
+        self._jtis: dict[str, float] = {}
+        self._users: dict[int, float] = {}
+        self._synced_until: datetime | None = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, user_id: int, jti: str | None, issued_at: float) -> bool:
+        revoked_before = self._users.get(user_id)
+        # our tokens carry iat with microseconds, so a new login right after the revocation
+        # passes; older whole-second tokens from the same second count as revoked
+        if revoked_before is not None and issued_at <= revoked_before:
+            return True
+        return jti is not None and jti in self._jtis
+
+    def add(self, user_id: int, jti: str | None, revoked_at: datetime, expires_at: datetime):
+        with self._lock:
+            if jti is not None:
+                self._jtis[jti] = expires_at.timestamp()
+            else:
+                self._users[user_id] = max(self._users.get(user_id, 0.0), revoked_at.timestamp())
+
+    def sync(self, db: Session) -> int:
+        """Pulls revocations written since the last sync, returns how many rows were read."""
+        stmt = select(
+            models.TokenRevocation.user_id,
+            models.TokenRevocation.jti,
+            models.TokenRevocation.revoked_at,
+            models.TokenRevocation.expires_at,
+        ).where(models.TokenRevocation.expires_at > datetime.now(timezone.utc))
+        if self._synced_until is not None:
+            stmt = stmt.where(models.TokenRevocation.revoked_at > self._synced_until - timedelta(seconds=SYNC_OVERLAP_SECONDS))
+        rows = db.execute(stmt).all()
+        db.rollback()
+
+        for row in rows:
+            self.add(row.user_id, row.jti, row.revoked_at, row.expires_at)
+            if self._synced_until is None or row.revoked_at > self._synced_until:
+                self._synced_until = row.revoked_at
+        if self._synced_until is None:
+            # nothing revoked yet, later syncs still only need recent rows
+            self._synced_until = datetime.now(timezone.utc)
+        self._prune()
+        return len(rows)
+
+    def _prune(self):
+        now = time.time()
+        # a user-wide revocation matters as long as a refresh token issued before it can live
+        horizon = now - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS).total_seconds()
+        with self._lock:
+            self._jtis = {jti: expires for jti, expires in self._jtis.items() if expires > now}
+            self._users = {user_id: revoked for user_id, revoked in self._users.items() if revoked > horizon}
+
+
+revocations = RevocationSet()
+
+
+def revoke_token(db: Session, user_id: int, jti: str, expires_at: datetime) -> bool:
+    """Revokes one refresh token; False when it was revoked already (e.g. a replayed token)."""
+    revoked_at = db.execute(
+        insert(models.TokenRevocation)
+        .values(user_id=user_id, jti=jti, expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=["jti"])
+        .returning(models.TokenRevocation.revoked_at)
+    ).scalar()
+    if revoked_at is None:
+        return False
+    revocations.add(user_id, jti, revoked_at, expires_at)
+    return True
+
+
+def revoke_user(db: Session, user_id: int):
+    """Revokes every access and refresh token issued to the user so far."""
+    revoked_at = db.execute(
+        insert(models.TokenRevocation)
+        .values(user_id=user_id, expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+        .returning(models.TokenRevocation.revoked_at)
+    ).scalar_one()
+    revocations.add(user_id, None, revoked_at, revoked_at)
+
+
+def run_revocation_sync(interval: int = settings.TOKEN_REVOCATION_SYNC_SECONDS):
+    while True:
+        time.sleep(interval)
+        db = SessionLocal()
+        try:
+            revocations.sync(db)
+        except Exception:
+            db.rollback()
+            logger.exception("Token revocation sync failed")
+        finally:
+            db.close()
+
+
+def start_revocation_sync():
+    """Loads the revocations once, then keeps them current from a daemon thread."""
+    db = SessionLocal()
+    try:
+        logger.info("Loaded %s token revocation(s)", revocations.sync(db))
+    except Exception:
+        db.rollback()
+        logger.exception("Initial token revocation load failed, retrying in the background")
+    finally:
+        db.close()
+
+    thread = threading.Thread(target=run_revocation_sync, name="token-revocation-sync", daemon=True)
+    thread.start()
+    return thread
+
+
+# sign a user out everywhere: python -m app.auth.revocation --user 42
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Revoke every token issued to a user")
+    parser.add_argument("--user", type=int, required=True)
+    args = parser.parse_args()
+
+    setup_logging()
+    session = SessionLocal()
+    try:
+        revoke_user(session, args.user)
+        session.commit()
+        print(f"Revoked all tokens of user {args.user}")
+    finally:
+        session.close()
@@ -11,15 +11,62 @@ class Settings(BaseSettings):
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     ALGORITHM: str = Field(..., env="ALGORITHM")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(..., env="ACCESS_TOKEN_EXPIRE_MINUTES")   
+    REFRESH_TOKEN_EXPIRE_DAYS: int = Field(30, env="REFRESH_TOKEN_EXPIRE_DAYS")
+    TOKEN_REVOCATION_SYNC_SECONDS: int = Field(10, env="TOKEN_REVOCATION_SYNC_SECONDS")
+    MEMBERSHIP_VERSION_CACHE_SECONDS: int = Field(5, env="MEMBERSHIP_VERSION_CACHE_SECONDS")
     GOOGLE_CLIENT_ID: str = Field(..., env="GOOGLE_CLIENT_ID")
     GOOGLE_CLIENT_SECRET: str = Field(..., env="GOOGLE_CLIENT_SECRET")
     GOOGLE_REDIRECT_URI: str = Field(..., env="GOOGLE_REDIRECT_URI")
+    OIDC_ISSUER: str = Field("https://accounts.google.com", env="OIDC_ISSUER")
+    OIDC_CACHE_TTL_SECONDS: int = Field(3600, env="OIDC_CACHE_TTL_SECONDS")
+    OAUTH_STATE_TTL_SECONDS: int = Field(600, env="OAUTH_STATE_TTL_SECONDS")
+    LOGIN_REDIRECT_ORIGINS: str = Field("", env="LOGIN_REDIRECT_ORIGINS")
     AWS_ACCESS_KEY_ID: str = Field(..., env="AWS_ACCESS_KEY_ID")
     AWS_SECRET_ACCESS_KEY: str = Field(..., env="AWS_SECRET_ACCESS_KEY")
     # AWS_SESSION_TOKEN: str = Field(..., env="AWS_SESSION_TOKEN")
     AWS_S3_BUCKET: str = Field(..., env="AWS_S3_BUCKET")
     AWS_REGION: str = Field(..., env="AWS_REGION")
+    AWS_S3_ENDPOINT_URL: str | None = Field(None, env="AWS_S3_ENDPOINT_URL")
     ALLOWED_ORIGIN: str = Field(..., env="ALLOWED_ORIGIN")
+    IDEMPOTENCY_KEY_TTL_HOURS: int = Field(24, env="IDEMPOTENCY_KEY_TTL_HOURS")
+    OVERDUE_SWEEP_INTERVAL_SECONDS: int = Field(300, env="OVERDUE_SWEEP_INTERVAL_SECONDS")
+    OVERDUE_SWEEP_BATCH_SIZE: int = Field(500, env="OVERDUE_SWEEP_BATCH_SIZE")
+    SQL_STATS_ENABLED: bool = Field(True, env="SQL_STATS_ENABLED")
+    SQL_STATS_HEADERS: bool = Field(False, env="SQL_STATS_HEADERS")
+    SQL_N_PLUS_ONE_THRESHOLD: int = Field(10, env="SQL_N_PLUS_ONE_THRESHOLD")
+    METRICS_ENABLED: bool = Field(False, env="METRICS_ENABLED")
+    METRICS_TOKEN: str = Field("", env="METRICS_TOKEN")
+    METRICS_MULTIPROC_DIR: str | None = Field(None, env="METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_SECONDS: float = Field(5.0, env="METRICS_FLUSH_SECONDS")
+    COMPRESSION_ENABLED: bool = Field(True, env="COMPRESSION_ENABLED")
+    COMPRESSION_MIN_SIZE: int = Field(1024, env="COMPRESSION_MIN_SIZE")
+    COMPRESSION_GZIP_LEVEL: int = Field(6, env="COMPRESSION_GZIP_LEVEL")
+    COMPRESSION_BROTLI_QUALITY: int = Field(5, env="COMPRESSION_BROTLI_QUALITY")
+    COMPRESSION_CACHE_BYTES: int = Field(16 * 1024 * 1024, env="COMPRESSION_CACHE_BYTES")
+    PROFILER_SECRET: str | None = Field(None, env="PROFILER_SECRET")
+    PROFILER_SAMPLE_RATE: float = Field(0.0, env="PROFILER_SAMPLE_RATE")
+    PROFILER_INTERVAL_MS: int = Field(5, env="PROFILER_INTERVAL_MS")
+    PROFILER_DIR: str = Field("./profiles", env="PROFILER_DIR")
+    LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
+    LOG_LEVELS: str = Field("", env="LOG_LEVELS")
+    LOG_FORMAT: str = Field("json", env="LOG_FORMAT")
+    LOG_FILE: str | None = Field(None, env="LOG_FILE")
+    LOG_QUEUE_SIZE: int = Field(10000, env="LOG_QUEUE_SIZE")
+    TRACE_FILE: str | None = Field(None, env="TRACE_FILE")
+    TRACE_SAMPLE_RATE: float = Field(1.0, env="TRACE_SAMPLE_RATE")
+    TRACE_SERVICE_NAME: str = Field("troposphere-api", env="TRACE_SERVICE_NAME")
+    DB_POOL_SIZE: int = Field(5, env="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(10, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: int = Field(30, env="DB_POOL_TIMEOUT")
+    DB_RESERVED_CONNECTIONS: int = Field(5, env="DB_RESERVED_CONNECTIONS")
+    DB_APP_INSTANCES: int = Field(1, env="DB_APP_INSTANCES")
+    WEB_CONCURRENCY: int | None = Field(None, env="WEB_CONCURRENCY")
+    WORKERS_PER_CPU: float = Field(1.0, env="WORKERS_PER_CPU")
+    MAX_WORKERS: int = Field(16, env="MAX_WORKERS")
+    MAX_REQUESTS_PER_WORKER: int = Field(10000, env="MAX_REQUESTS_PER_WORKER")
+    GRACEFUL_SHUTDOWN_SECONDS: int = Field(30, env="GRACEFUL_SHUTDOWN_SECONDS")
+    HOST: str = Field("0.0.0.0", env="HOST")
+    PORT: int = Field(80, env="PORT")
         
     model_config = SettingsConfigDict(env_file="./app/.env", env_file_encoding="utf-8", extra="allow")
 
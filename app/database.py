@@ -6,7 +6,13 @@ class Base(DeclarativeBase):
     pass
 
 SQLALCHEMY_DATABASE_URL = f'postgresql+psycopg://{settings.DATABASE_USERNAME}:{settings.DATABASE_PASSWORD}@{settings.DATABASE_HOSTNAME}:{settings.DATABASE_PORT}/{settings.DATABASE_NAME}'
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# pool sizes are set per worker by the launcher (app/server.py) to fit max_connections
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -1,24 +1,50 @@
-from typing import Optional
+from typing import Iterable, Optional
 from fastapi.security import HTTPAuthorizationCredentials
 import jwt
-from fastapi import Depends, HTTPException, Path, status
+from fastapi import Depends, HTTPException, Path, Query, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from .database import get_db
 from .config import settings
 from . import models
-from .auth.oauth import security
+from .auth.claims import club_role
+from .auth.oauth import TokenRevokedError, TokenUser, decode_token, security
+from .utils.tracing import traced
 
-# Dependency to get the current user from the JWT token (check if user is logged in)
-def get_current_user(db: Session = Depends(get_db), credentials: HTTPAuthorizationCredentials = Depends(security)):
-    token = credentials.credentials
+def _token_payload(credentials: HTTPAuthorizationCredentials) -> dict:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return decode_token(credentials.credentials)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired")
+    except TokenRevokedError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
     except jwt.PyJWTError:
-        print("here")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
+
+# Dependency to get the caller from the access token alone (check if user is logged in).
+# Enough for the role checks and anything that only needs the user's id; no database query.
+@traced("auth.get_token_user")
+def get_token_user(db: Session = Depends(get_db), credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenUser:
+    payload = _token_payload(credentials)
+    user_id = int(payload["user_id"])
+    if "role" in payload:
+        return TokenUser(user_id, payload["role"], payload.get("mv", 0), payload.get("clubs"))
+
+    # issued before access tokens carried the role, look it up until those expire
+    row = db.execute(
+        select(models.User.global_role, models.User.membership_version).where(models.User.id == user_id)
+    ).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return TokenUser(user_id, row.global_role, row.membership_version)
+
+
+# Dependency to get the current user's row from the JWT token, for endpoints that need the
+# profile (name, email, memberships) rather than just the id and role
+@traced("auth.get_current_user")
+def get_current_user(db: Session = Depends(get_db), credentials: HTTPAuthorizationCredentials = Depends(security)):
+    payload = _token_payload(credentials)
     user = db.query(models.User).filter(models.User.id == int(payload.get("user_id"))).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
@@ -26,7 +52,8 @@ def get_current_user(db: Session = Depends(get_db), credentials: HTTPAuthorizati
 
 # Dependecy to check if user has a specific role in a club to access certain routes as well as if they are logged in
 def require_club_role(role: int):
-    def role_checker(club_id: int, current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db), club : models.Club = Depends(is_club_exist)):
+    @traced("auth.require_club_role")
+    def role_checker(club_id: int, current_user: TokenUser = Depends(get_token_user), db: Session = Depends(get_db), club : models.Club = Depends(is_club_exist)):
         # allow access if user is a superuser
         if current_user.global_role == models.GlobalRoles.SUPERUSER.value:
             return current_user
@@ -36,15 +63,13 @@ def require_club_role(role: int):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Superuser role required")
         # else make sure appropriate club role is present
 
-        membership = db.query(models.Membership).filter(
-            models.Membership.user_id == current_user.id,
-            models.Membership.club_id == club_id
-        ).first()
+        # from the token's club claims when they are current, otherwise from memberships
+        member_role = club_role(db, current_user, club_id)
         # if they have no membership at all in the current club then we provide no access
-        if not membership:
+        if member_role is None:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient Permissions! Not a member of the Club")
         # we need the role to be higher or equal to the required role
-        if role <= membership.role:
+        if role <= member_role:
             return current_user
         else:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient Permissions!")
@@ -54,7 +79,8 @@ def require_club_role(role: int):
 
 # Dependecy to check if user has a required global role in a club to access certain routes as well as if they are logged in
 def require_global_role(role: int):
-    def role_checker(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    @traced("auth.require_global_role")
+    def role_checker(current_user: TokenUser = Depends(get_token_user), db: Session = Depends(get_db)):
         # allow access if user is a superuser
         if current_user.global_role >= role:
             return current_user
@@ -63,12 +89,14 @@ def require_global_role(role: int):
 
     return role_checker
 
+@traced("deps.is_club_exist")
 def is_club_exist(club_id : int, db: Session = Depends(get_db)):
     club = db.query(models.Club).filter(models.Club.id == club_id).first()
     if not club:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Club does not exist")
     return club
 
+@traced("deps.is_item_exist")
 def is_item_exist(item_id : int, db: Session = Depends(get_db)):
     item = db.query(models.Item).filter(models.Item.id == item_id).first()
     if not item:
@@ -76,31 +104,25 @@ def is_item_exist(item_id : int, db: Session = Depends(get_db)):
     return item
 
 def require_member_role():
+    @traced("auth.require_member_role")
     def member_checker(
         club_id: int,
-        current_user: models.User = Depends(get_current_user),
+        current_user: TokenUser = Depends(get_token_user),
         db: Session = Depends(get_db),
         club: models.Club = Depends(is_club_exist)
     ):
         if current_user.global_role == models.GlobalRoles.SUPERUSER.value:
             return current_user
 
-        membership = (
-            db.query(models.Membership)
-            .filter(
-                models.Membership.user_id == current_user.id,
-                models.Membership.club_id == club_id
-            )
-            .first()
-        )
+        member_role = club_role(db, current_user, club_id)
 
-        if not membership:
+        if member_role is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You are not a member of this club."
             )
         
-        if membership.role != models.ClubRoles.MEMBER.value:
+        if member_role != models.ClubRoles.MEMBER.value:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Only members can perform this action."
@@ -108,4 +130,25 @@ def require_member_role():
 
         return current_user
 
-    return member_checker
\ No newline at end of file
+    return member_checker
+
+
+# Dependency for the `fields=` parameter of list endpoints: a comma separated subset of `allowed`.
+# Returns the requested names in allow-list order (None when the parameter is absent).
+def sparse_fields(allowed: Iterable[str]):
+    allowed = tuple(allowed)
+
+    def fields_parser(
+        fields: Optional[str] = Query(None, description=f"Comma separated fields to return, any of: {', '.join(allowed)}"),
+    ) -> Optional[tuple[str, ...]]:
+        if fields is None:
+            return None
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested.difference(allowed)
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown field(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}")
+        if not requested:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"No fields given. Allowed: {', '.join(allowed)}")
+        return tuple(name for name in allowed if name in requested)
+
+    return fields_parser
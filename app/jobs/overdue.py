@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from ..logger import setup_logging
+from ..utils.projections import latest_transaction_status
+
+# Marks handed-over loans past their return date in overdue_loans.
+# The sweep walks the partial (return_date, id) index of open loans from where the last run
+# stopped, one bounded batch per short transaction, so a large backlog never holds long locks.
+# A loan can land behind that cursor: a replayed /sync borrow is inserted with a return date
+# that has already passed, and a high-risk request only becomes a loan when it is approved,
+# possibly after its return date. Both write an APPROVED transaction, so each run first catches
+# up on the loans behind the cursor approved since the previous run (transaction ids above its
+# mark, less CATCH_UP_OVERLAP for transactions that committed out of id order).
+# Workers can all run the scheduler: the checkpoint row is locked with SKIP LOCKED for each
+# batch, so only one of them advances it at a time.
+
+JOB_NAME = "overdue_sweep"
+CATCH_UP_OVERLAP = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def _open_loans():
+    return (
+        select(
+            models.ItemBorrowingRequest.id,
+            models.ItemBorrowingRequest.return_date,
+            models.Item.club_id,
+        )
+        .join(models.Item, models.ItemBorrowingRequest.item_id == models.Item.id)
+        .where(
+            models.ItemBorrowingRequest.returned_at.is_(None),
+            latest_transaction_status == models.BorrowStatus.APPROVED,
+        )
+    )
+
+
+def _catch_up_batch(checkpoint: models.JobCheckpoint):
+    """Unmarked loans behind the cursor with an approval newer than the last run's mark."""
+    approved_since = (
+        select(models.ItemBorrowingTransaction.item_borrowing_request_id)
+        .where(
+            models.ItemBorrowingTransaction.id > checkpoint.checkpoint_transaction_id - CATCH_UP_OVERLAP,
+            models.ItemBorrowingTransaction.status == models.BorrowStatus.APPROVED,
+        )
+    )
+    return _open_loans().where(
+        models.ItemBorrowingRequest.id.in_(approved_since),
+        tuple_(models.ItemBorrowingRequest.return_date, models.ItemBorrowingRequest.id)
+        <= tuple_(checkpoint.checkpoint_at, checkpoint.checkpoint_id),
+        # the overlap re-reads a few loans, the marked ones drop out here
+        ~select(models.OverdueLoan.id)
+        .where(models.OverdueLoan.item_borrowing_request_id == models.ItemBorrowingRequest.id)
+        .exists(),
+    ).order_by(models.ItemBorrowingRequest.id)
+
+
+def _forward_batch(checkpoint: models.JobCheckpoint, now: datetime):
+    stmt = _open_loans().where(models.ItemBorrowingRequest.return_date <= now)
+    if checkpoint.checkpoint_at is not None:
+        stmt = stmt.where(
+            tuple_(models.ItemBorrowingRequest.return_date, models.ItemBorrowingRequest.id)
+            > tuple_(checkpoint.checkpoint_at, checkpoint.checkpoint_id)
+        )
+    return stmt.order_by(models.ItemBorrowingRequest.return_date, models.ItemBorrowingRequest.id)
+
+
+def sweep_overdue_loans(db: Session, batch_size: int = settings.OVERDUE_SWEEP_BATCH_SIZE) -> int:
+    """Marks loans that became overdue since the last checkpoint, returns how many were marked."""
+    db.execute(insert(models.JobCheckpoint).values(name=JOB_NAME).on_conflict_do_nothing(index_elements=["name"]))
+    db.commit()
+
+    now = datetime.now(timezone.utc)
+    # taken before the sweep: approvals committed during it are caught up by the next run
+    transaction_mark = db.execute(select(func.max(models.ItemBorrowingTransaction.id))).scalar() or 0
+    db.rollback()
+    catching_up = True
+    marked = 0
+
+    while True:
+        checkpoint = db.execute(
+            select(models.JobCheckpoint)
+            .where(models.JobCheckpoint.name == JOB_NAME)
+            .with_for_update(skip_locked=True)
+        ).scalars().first()
+        # another worker is sweeping right now
+        if checkpoint is None:
+            db.rollback()
+            break
+
+        # nothing is behind the cursor before the first run has moved it
+        catching_up = catching_up and checkpoint.checkpoint_at is not None
+        stmt = _catch_up_batch(checkpoint) if catching_up else _forward_batch(checkpoint, now)
+        rows = db.execute(stmt.limit(batch_size)).all()
+
+        if rows:
+            db.execute(
+                insert(models.OverdueLoan)
+                .values([
+                    {"item_borrowing_request_id": row.id, "club_id": row.club_id, "return_date": row.return_date}
+                    for row in rows
+                ])
+                .on_conflict_do_nothing(index_elements=["item_borrowing_request_id"])
+            )
+            if not catching_up:
+                checkpoint.checkpoint_at = rows[-1].return_date
+                checkpoint.checkpoint_id = rows[-1].id
+            marked += len(rows)
+
+        checkpoint.updated_at = now
+        if len(rows) == batch_size:
+            db.commit()
+        elif catching_up:
+            catching_up = False
+            db.commit()
+        else:
+            checkpoint.checkpoint_transaction_id = max(checkpoint.checkpoint_transaction_id, transaction_mark)
+            db.commit()
+            break
+
+    if marked:
+        logger.info("Overdue sweep marked %s loan(s)", marked)
+    return marked
+
+
+def run_overdue_scheduler(interval: int = settings.OVERDUE_SWEEP_INTERVAL_SECONDS):
+    while True:
+        time.sleep(interval)
+        db = SessionLocal()
+        try:
+            sweep_overdue_loans(db)
+        except Exception:
+            db.rollback()
+            logger.exception("Overdue sweep failed")
+        finally:
+            db.close()
+
+
+def start_overdue_scheduler():
+    """Starts the periodic sweep in a daemon thread, unless disabled in the settings."""
+    if settings.OVERDUE_SWEEP_INTERVAL_SECONDS <= 0:
+        return None
+    thread = threading.Thread(target=run_overdue_scheduler, name="overdue-sweep", daemon=True)
+    thread.start()
+    return thread
+
+
+# run a single sweep, e.g. from cron: python -m app.jobs.overdue
+if __name__ == "__main__":
+    setup_logging()
+    session = SessionLocal()
+    try:
+        print(f"Marked {sweep_overdue_loans(session)} overdue loan(s)")
+    finally:
+        session.close()
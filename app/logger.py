@@ -1,7 +1,125 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+from .config import settings
+from .utils.metrics import registry
+from .utils.tracing import request_id_var
+
+# Log records are put on an in-memory queue by the request threads and written to stdout (and
+# LOG_FILE) by a QueueListener thread, so slow terminals, pipes or disks never block a request.
+# The queue is bounded: when the writer falls behind, new records are dropped and counted
+# instead of growing memory without limit.
+
+# attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+_listener: logging.handlers.QueueListener | None = None
+
+dropped_records = registry.counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+registry.gauge("log_queue_depth", "Log records waiting to be written", callback=lambda: {(): log_queue.qsize()})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any extra={...} fields as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # merge the args now (they may change once the request moves on) but leave the
+        # layout, including the traceback, to the formatter on the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records.inc()
+
+
+class RequestIdFilter(logging.Filter):
+    """Tags records with the correlation ID of the request that logged them."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = request_id_var.get()
+        if request_id is not None:
+            record.request_id = request_id
+        return True
+
+
+def _parse_levels(value: str) -> dict[str, str]:
+    """'sqlalchemy.engine=WARNING,app.middleware=DEBUG' -> {logger: level}"""
+    levels = {}
+    for pair in filter(None, (part.strip() for part in value.split(","))):
+        name, _, level = pair.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
 
 def setup_logging():
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    )
\ No newline at end of file
+    global _listener
+    if _listener is not None:
+        return
+
+    if settings.LOG_FORMAT.lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter("%(asctime)s [%(levelname)s] [%(request_id)s] %(name)s: %(message)s", defaults={"request_id": "-"})
+
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if settings.LOG_FILE:
+        # reopens the file when logrotate moves it
+        handlers.append(logging.handlers.WatchedFileHandler(settings.LOG_FILE))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+    root.addHandler(queue_handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name, level in _parse_levels(settings.LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Writes out whatever is still queued and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
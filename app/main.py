@@ -1,13 +1,39 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .routers import login, clubs, items, borrow, returns, users
+from fastapi.responses import ORJSONResponse
+from .routers import login, clubs, items, borrow, returns, users, exports, sync, events, overdue, metrics, profiling
 from .database import Base, engine
-from starlette.middleware.sessions import SessionMiddleware
 from .config import settings
 from .logger import setup_logging
 import logging
 from starlette.middleware.cors import CORSMiddleware
+from .jobs.overdue import start_overdue_scheduler
+from .auth.oidc import start_oidc_refresher
+from .auth.revocation import start_revocation_sync
+from .utils.lifecycle import install_drain_handlers
+from .utils.metrics import flush_metrics, start_metrics_flush
+from .middleware.sql_stats import SQLStatsMiddleware
+from .middleware.metrics import MetricsMiddleware
+from .middleware.profiling import ProfilingMiddleware
+from .middleware.compression import CompressionMiddleware
+from .middleware.tracing import TracingMiddleware
+from .middleware.auth_session import AuthSessionMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    install_drain_handlers()
+    start_overdue_scheduler()
+    start_oidc_refresher()
+    start_revocation_sync()
+    if settings.METRICS_ENABLED:
+        start_metrics_flush(settings.METRICS_MULTIPROC_DIR, settings.METRICS_FLUSH_SECONDS)
+    yield
+    flush_metrics()
+
+
+# orjson renders every JSON response, see utils/responses.py for the single-pass model path
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,7 +44,23 @@ app.add_middleware(
 )
 
 
-app.add_middleware(SessionMiddleware, secret_key=settings.SECRET_KEY)
+# the cookie session only carries the OAuth login state, so only /auth gets it
+app.add_middleware(AuthSessionMiddleware)
+
+# compresses the finished body, the headers added by the middleware around it are untouched
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+app.add_middleware(ProfilingMiddleware)
+
+# metrics read the SQL counters, so SQLStatsMiddleware has to wrap it (added later = outer)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.SQL_STATS_ENABLED:
+    app.add_middleware(SQLStatsMiddleware)
+
+# outermost, so the correlation ID and root span cover everything below
+app.add_middleware(TracingMiddleware)
 
 app.include_router(login.router)
 app.include_router(clubs.router)
@@ -26,11 +68,21 @@ app.include_router(items.router)
 app.include_router(borrow.router)
 app.include_router(returns.router)
 app.include_router(users.router)
+app.include_router(exports.router)
+app.include_router(sync.router)
+app.include_router(events.router)
+app.include_router(overdue.router)
+app.include_router(profiling.router)
+# route names, pool state and error counts are not for the public: no token, no endpoint
+if settings.METRICS_ENABLED and settings.METRICS_TOKEN:
+    app.include_router(metrics.router)
 
 # we don't need this as alembic will take care of it
 # Base.metadata.create_all(bind=engine)
 setup_logging()
 logger = logging.getLogger(__name__)
+if settings.METRICS_ENABLED and not settings.METRICS_TOKEN:
+    logger.warning("METRICS_TOKEN is not set, /metrics is not served")
 
 @app.get("/")
 def root():
@@ -0,0 +1,37 @@
+from starlette.middleware.sessions import SessionMiddleware
+from ..config import settings
+
+# The cookie session exists only to hold the OAuth login state between /auth/ and the
+# callback, so SessionMiddleware runs for paths under /auth alone: the API requests skip the
+# cookie parsing and signing, and browsers only send the cookie back to /auth. It is a signed
+# cookie rather than server-side storage, so any worker or node can finish a login another
+# one started.
+
+AUTH_PREFIX = "/auth"
+# not "session": a leftover cookie from when the session covered the whole site would be sent
+# along with this one and could shadow it
+SESSION_COOKIE = "oauth_state"
+
+
+class AuthSessionMiddleware:
+    def __init__(self, app, prefix: str = AUTH_PREFIX):
+        self.app = app
+        self.prefix = prefix
+        self.session_app = SessionMiddleware(
+            app,
+            secret_key=settings.SECRET_KEY,
+            session_cookie=SESSION_COOKIE,
+            max_age=settings.OAUTH_STATE_TTL_SECONDS,
+            path=prefix,
+            https_only=settings.GOOGLE_REDIRECT_URI.startswith("https://"),
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self._matches(scope["path"]):
+            await self.session_app(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    def _matches(self, path: str) -> bool:
+        # /auth and /auth/..., not /authors
+        return path == self.prefix or path.startswith(self.prefix + "/")
@@ -0,0 +1,142 @@
+import gzip
+from cachetools import LRUCache
+from starlette.datastructures import Headers, MutableHeaders
+from ..config import settings
+from ..utils.metrics import registry
+
+try:
+    import brotli
+except ImportError:  # optional C extension, gzip only without it
+    brotli = None
+
+# Response compression for the JSON/text payloads (item pages with image URLs, club lists).
+# The encoding is negotiated from Accept-Encoding (br preferred over gzip when both are
+# accepted and brotli is installed). Bodies under COMPRESSION_MIN_SIZE, streamed responses
+# (SSE, exports) and already encoded or binary content are passed through untouched.
+# Routes opt in to caching by setting an ETag: the compressed bodies of those GET 200
+# responses are kept in a per-worker LRU bounded to COMPRESSION_CACHE_BYTES, keyed by path,
+# query and ETag, so a repeated response is not compressed again. Other responses are
+# compressed every time; hashing each body to find a repeat would cost more than it saves.
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/xml", "application/javascript")
+# never buffered: a client is waiting for each event
+STREAMING_TYPES = ("text/event-stream",)
+
+compressed_responses = registry.counter(
+    "http_compressed_responses_total", "Compressed responses by encoding and cache result", ("encoding", "cache")
+)
+compression_saved_bytes = registry.counter(
+    "http_compression_saved_bytes_total", "Bytes saved by response compression", ("encoding",)
+)
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """Picks br or gzip from an Accept-Encoding header, None when neither is acceptable."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    candidates = ("br", "gzip") if brotli is not None else ("gzip",)
+    best = None
+    for coding in candidates:
+        weight = weights.get(coding, wildcard)
+        if weight > 0 and (best is None or weight > best[1]):
+            best = (coding, weight)
+    return best[0] if best else None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = settings.COMPRESSION_MIN_SIZE,
+        gzip_level: int = settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = settings.COMPRESSION_BROTLI_QUALITY,
+        cache_bytes: int = settings.COMPRESSION_CACHE_BYTES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = LRUCache(maxsize=cache_bytes, getsizeof=len) if cache_bytes > 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # held back until the body shows whether it is worth compressing
+                start = message
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            if message.get("more_body", False) or not self._compressible(start["status"], headers, body):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = self._compressed(scope, start["status"], headers, body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, status_code: int, headers: MutableHeaders, body: bytes) -> bool:
+        content_type = headers.get("content-type", "")
+        return (
+            len(body) >= self.minimum_size
+            and status_code not in (204, 206, 304)
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith(STREAMING_TYPES)
+        )
+
+    def _compressed(self, scope, status_code: int, headers: MutableHeaders, body: bytes, encoding: str) -> bytes:
+        key = None
+        etag = headers.get("etag")
+        if self.cache is not None and etag and scope["method"] == "GET" and status_code == 200:
+            key = (encoding, scope["path"], scope["query_string"], etag)
+            cached = self.cache.get(key)
+            if cached is not None:
+                compressed_responses.inc(encoding, "hit")
+                compression_saved_bytes.inc(encoding, amount=len(body) - len(cached))
+                return cached
+
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+        if key is not None and len(compressed) <= self.cache.maxsize:
+            self.cache[key] = compressed
+        compressed_responses.inc(encoding, "miss" if key is not None else "uncached")
+        compression_saved_bytes.inc(encoding, amount=len(body) - len(compressed))
+        return compressed
@@ -0,0 +1,71 @@
+import time
+from ..database import engine
+from ..utils.metrics import registry
+from .sql_stats import current_query_stats
+
+# Per-route request metrics. Routes are labelled by their path template (/items/{item_id}),
+# never the raw path, so label cardinality stays bounded; unmatched paths share one label.
+
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route")
+)
+requests_total = registry.counter(
+    "http_requests_total", "Requests by route and status code", ("method", "route", "status")
+)
+requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests currently being handled"
+)
+db_statements = registry.counter(
+    "db_statements_total", "SQL statements sent by route", ("method", "route")
+)
+db_statement_seconds = registry.counter(
+    "db_statement_seconds_total", "Time spent in SQL statements by route", ("method", "route")
+)
+
+
+def _pool_stats():
+    pool = engine.pool
+    stats = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            stats[(name,)] = getattr(pool, name)()
+    return stats
+
+
+registry.gauge("db_pool_connections", "SQLAlchemy connection pool state", ("state",), callback=_pool_stats)
+
+
+class MetricsMiddleware:
+    """Records latency, status and SQL counts per route. Add it inside SQLStatsMiddleware."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+        requests_in_flight.inc()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec()
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            request_seconds.observe(method, route, value=time.perf_counter() - started)
+            requests_total.inc(method, route, str(status_code))
+            stats = current_query_stats()
+            if stats is not None:
+                db_statements.inc(method, route, amount=stats.count)
+                db_statement_seconds.inc(method, route, amount=stats.duration)
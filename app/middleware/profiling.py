@@ -0,0 +1,166 @@
+import hashlib
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from ..config import settings
+
+# On-demand sampling profiler.
+# A request is profiled when it carries a valid X-Profile header (an expiry timestamp signed
+# with PROFILER_SECRET) or when an admin has switched sampling on for this worker (see
+# routers/profiling.py). A sampler thread then snapshots the stacks of the event loop thread
+# and of busy threadpool workers every PROFILER_INTERVAL_MS until the response is sent, and
+# writes them as folded stacks ("frame;frame;frame count"), the input format of flamegraph.pl,
+# speedscope and inferno. Other requests running at the same time on the same worker can show
+# up in the threadpool samples. When neither trigger is set, the middleware costs one header
+# scan and one float comparison per request.
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+logger = logging.getLogger(__name__)
+
+# innermost frames of a thread that is waiting for work rather than doing it
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py")
+
+
+class SamplingToggle:
+    """Admin switch for sampling a fraction of requests on this worker, until it expires."""
+
+    def __init__(self):
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE
+        self.path_prefix: str | None = None
+        self.expires_at: datetime | None = None
+
+    def set(self, sample_rate: float, path_prefix: str | None, expires_at: datetime):
+        self.path_prefix = path_prefix
+        self.expires_at = expires_at
+        self.sample_rate = sample_rate
+
+    def should_sample(self, path: str) -> bool:
+        if self.sample_rate <= 0:
+            return False
+        if self.expires_at is not None and datetime.now(timezone.utc) >= self.expires_at:
+            self.sample_rate = 0.0
+            return False
+        if self.path_prefix and not path.startswith(self.path_prefix):
+            return False
+        return random.random() < self.sample_rate
+
+
+toggle = SamplingToggle()
+
+
+def sign_profile_token(expires_at: int, secret: str | None = None) -> str:
+    secret = secret or settings.PROFILER_SECRET
+    signature = hmac.new(secret.encode(), str(expires_at).encode(), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{signature}"
+
+
+def verify_profile_token(token: str) -> bool:
+    if not settings.PROFILER_SECRET:
+        return False
+    expires_at, _, signature = token.partition(".")
+    if not expires_at.isdigit() or int(expires_at) < time.time():
+        return False
+    return hmac.compare_digest(sign_profile_token(int(expires_at)), f"{expires_at}.{signature}")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Sampler(threading.Thread):
+    def __init__(self, loop_thread_id: int, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def _watched_threads(self):
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == self.loop_thread_id:
+                yield "event-loop", frame
+            elif names.get(thread_id, "").startswith("AnyIO worker thread"):
+                yield "threadpool", frame
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            for thread_label, frame in self._watched_threads():
+                if os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(thread_label)
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def write_profile(profile_id: str, method: str, path: str, samples: Counter) -> str:
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+    name = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{method}-{path.strip('/').replace('/', '_') or 'root'}-{profile_id}.folded"
+    file_path = os.path.join(settings.PROFILER_DIR, name)
+    with open(file_path, "w") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    return file_path
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.header = PROFILE_HEADER.lower().encode()
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return verify_profile_token(value.decode("latin-1"))
+        return toggle.should_sample(scope["path"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        sampler = Sampler(threading.get_ident(), settings.PROFILER_INTERVAL_MS / 1000)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())]}
+            await send(message)
+
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            sampler.stop()
+            elapsed = time.perf_counter() - started
+            if sampler.samples:
+                file_path = write_profile(profile_id, scope["method"], scope["path"], sampler.samples)
+                logger.info("Profiled %s %s in %.1f ms (%s samples): %s", scope["method"], scope["path"], elapsed * 1000, sum(sampler.samples.values()), file_path)
+            else:
+                logger.info("Profiled %s %s in %.1f ms, too fast for any sample", scope["method"], scope["path"], elapsed * 1000)
+
+
+# mint a header value for curl: python -m app.middleware.profiling 10
+if __name__ == "__main__":
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    if not settings.PROFILER_SECRET:
+        sys.exit("PROFILER_SECRET is not set")
+    print(f"{PROFILE_HEADER}: {sign_profile_token(int(time.time()) + minutes * 60)}")
@@ -0,0 +1,123 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from ..config import settings
+from ..database import engine
+
+# Counts the SQL statements and DB time of each request.
+# The counters live in a context variable set by the middleware; sync endpoints and
+# dependencies run in the threadpool with a copy of the request context, so their statements
+# land on the same counters. A statement repeated SQL_N_PLUS_ONE_THRESHOLD times or more in
+# one request is logged as a likely N+1. With SQL_STATS_HEADERS on (tests, load runs, never
+# production: they tell clients how the queries behave) the results also go out as
+# X-DB-Statements / X-DB-Time-Ms headers. Streaming responses only report what ran before
+# their first byte.
+
+STATEMENTS_HEADER = "X-DB-Statements"
+DB_TIME_HEADER = "X-DB-Time-Ms"
+
+logger = logging.getLogger(__name__)
+
+_PARAMETER = re.compile(r"%\(\w+\)s|\$\d+|\?|\b\d+\b|'(?:[^']|'')*'")
+_PARAMETER_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold: int):
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def normalize_statement(statement: str) -> str:
+    """Strips parameters and literals so the same query with other values compares equal."""
+    statement = _PARAMETER.sub("?", statement)
+    statement = _PARAMETER_LIST.sub("(?)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def count_statements():
+    """Counts the statements sent inside the block, e.g. around a job or a direct call."""
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def assert_max_statements(response, limit: int):
+    """Fails when a response (TestClient/httpx) reports more than `limit` SQL statements.
+
+    Needs the headers, i.e. the app built with SQL_STATS_HEADERS=true.
+    """
+    assert STATEMENTS_HEADER in response.headers, f"no {STATEMENTS_HEADER} header, set SQL_STATS_HEADERS=true"
+    count = int(response.headers[STATEMENTS_HEADER])
+    assert count <= limit, f"{response.request.method} {response.request.url.path} sent {count} SQL statements, expected at most {limit}"
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None or not conn.info.get("query_started"):
+        return
+    stats.duration += time.perf_counter() - conn.info["query_started"].pop()
+    stats.count += 1
+    stats.statements[normalize_statement(statement)] += 1
+
+
+class SQLStatsMiddleware:
+    def __init__(self, app, threshold: int = settings.SQL_N_PLUS_ONE_THRESHOLD, headers: bool = settings.SQL_STATS_HEADERS):
+        self.app = app
+        self.threshold = threshold
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_stats(message):
+            if self.headers and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((STATEMENTS_HEADER.lower().encode(), str(stats.count).encode()))
+                headers.append((DB_TIME_HEADER.lower().encode(), f"{stats.duration * 1000:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            for statement, count in stats.repeated(self.threshold):
+                logger.warning(
+                    "Possible N+1 on %s %s: statement ran %s times: %s",
+                    scope["method"], scope["path"], count, statement[:300],
+                )
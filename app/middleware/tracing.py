@@ -0,0 +1,124 @@
+import random
+import re
+import uuid
+from sqlalchemy import event
+from ..config import settings
+from ..database import engine, SessionLocal
+from ..utils.tracing import (
+    SPAN_KIND_CLIENT, SPAN_KIND_SERVER, Span, Trace, activate, current_span, deactivate, exporter, request_id_var,
+)
+from .sql_stats import normalize_statement
+
+# Correlation IDs and request spans, see utils/tracing.py. An incoming X-Request-ID is reused
+# when it looks sane, a W3C traceparent header joins the caller's trace.
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class TracingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self.sample_rate = settings.TRACE_SAMPLE_RATE if exporter.enabled else 0.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        request_id = headers.get(REQUEST_ID_HEADER.lower().encode(), b"").decode("latin-1")
+        if not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        request_id_token = request_id_var.set(request_id)
+
+        root = None
+        span_token = None
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            parent = _TRACEPARENT.match(headers.get(b"traceparent", b"").decode("latin-1"))
+            root = Span(
+                Trace(parent.group(1) if parent else None),
+                f"{scope['method']} {scope['path']}",
+                parent.group(2) if parent else None,
+                SPAN_KIND_SERVER,
+                {"http.method": scope["method"], "http.target": scope["path"], "request.id": request_id},
+            )
+            span_token = activate(root)
+
+        status_code = 500
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (REQUEST_ID_HEADER.lower().encode(), request_id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        except BaseException as e:
+            if root is not None:
+                root.attributes["http.status_code"] = status_code
+                root.end(error=e)
+                exporter.export(root.trace)
+            raise
+        else:
+            if root is not None:
+                route = scope.get("route")
+                if route is not None:
+                    root.name = f"{scope['method']} {route.path}"
+                    root.attributes["http.route"] = route.path
+                root.attributes["http.status_code"] = status_code
+                root.end(error=RuntimeError(f"HTTP {status_code}") if status_code >= 500 else None)
+                exporter.export(root.trace)
+        finally:
+            if span_token is not None:
+                deactivate(span_token)
+            request_id_var.reset(request_id_token)
+
+
+# one span per SQL statement, the FOR UPDATE wait shows up as the duration of its SELECT
+@event.listens_for(engine, "before_cursor_execute")
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany):
+    parent = current_span()
+    if parent is not None:
+        conn.info.setdefault("trace_spans", []).append(
+            parent.child("db.query", SPAN_KIND_CLIENT, **{"db.system": "postgresql", "db.statement": normalize_statement(statement)[:500]})
+        )
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany):
+    if conn.info.get("trace_spans"):
+        conn.info["trace_spans"].pop().end()
+
+
+@event.listens_for(engine, "handle_error")
+def _fail_statement_span(context):
+    spans = context.connection.info.get("trace_spans") if context.connection is not None else None
+    if spans:
+        spans.pop().end(error=context.original_exception)
+
+
+# commit spans cover the flush and the COMMIT round trip
+@event.listens_for(SessionLocal, "before_commit")
+def _start_commit_span(session):
+    parent = current_span()
+    if parent is not None:
+        session.info["trace_commit_span"] = parent.child("db.commit")
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _end_commit_span(session):
+    commit_span = session.info.pop("trace_commit_span", None)
+    if commit_span is not None:
+        commit_span.end()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _fail_commit_span(session):
+    commit_span = session.info.pop("trace_commit_span", None)
+    if commit_span is not None:
+        commit_span.end(error=RuntimeError("rolled back"))
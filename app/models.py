@@ -1,7 +1,7 @@
 # SQLAlchemy ORM Models
 
 from typing import Optional
-from sqlalchemy import JSON, ForeignKey, Integer, String, Boolean, UniqueConstraint, text, TIMESTAMP
+from sqlalchemy import JSON, ForeignKey, Index, Integer, String, Boolean, UniqueConstraint, text, TIMESTAMP
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 from .database import Base
@@ -40,6 +40,8 @@ class User(Base):
     provider : Mapped[str] = mapped_column(String, nullable=False)
     picture : Mapped[str] = mapped_column(String, nullable=True)
     global_role : Mapped[GlobalRoles] = mapped_column(Integer, nullable=False, default=GlobalRoles.USER)
+    # carried in access tokens, see auth/oauth.py
+    membership_version : Mapped[int] = mapped_column(Integer, nullable=False, server_default=text('0'))
     memberships : Mapped[list["Membership"]] = relationship("Membership", back_populates="user", cascade="all, delete-orphan")
     
     logs: Mapped[list["Logging"]] = relationship("Logging", back_populates="user", cascade="all, delete-orphan")
@@ -59,7 +61,7 @@ class Club(Base):
 class Membership(Base):
     __tablename__ = "memberships"
     user_id : Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
-    club_id : Mapped[int] = mapped_column(Integer, ForeignKey("clubs.id", ondelete="CASCADE"), primary_key=True)
+    club_id : Mapped[int] = mapped_column(Integer, ForeignKey("clubs.id", ondelete="CASCADE"), primary_key=True, index=True)
     role : Mapped[ClubRoles] = mapped_column(Integer, nullable=False, default=ClubRoles.MEMBER)
     joined_at : Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     
@@ -87,7 +89,7 @@ class ItemImage(Base):
     __tablename__ = "item_images"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
-    item_id: Mapped[int] = mapped_column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
+    item_id: Mapped[int] = mapped_column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False, index=True)
     image_url: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
 
@@ -95,11 +97,16 @@ class ItemImage(Base):
 
 class ItemBorrowingRequest(Base):
     __tablename__ = "item_borrowing_requests"
+    # only open loans can become overdue, so the sweep index skips returned ones
+    __table_args__ = (
+        Index("ix_item_borrowing_requests_open_return_date", "return_date", "id", postgresql_where=text("returned_at IS NULL")),
+    )
     id : Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
-    item_id : Mapped[int] = mapped_column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False)
-    borrower_id : Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    item_id : Mapped[int] = mapped_column(Integer, ForeignKey("items.id", ondelete="CASCADE"), nullable=False, index=True)
+    borrower_id : Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     return_date : Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now() + interval \'7 days\''))
     created_at : Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    returned_at : Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     
     borrower : Mapped["User"] = relationship("User")
     item : Mapped["Item"] = relationship("Item")
@@ -108,9 +115,9 @@ class ItemBorrowingRequest(Base):
 class ItemBorrowingTransaction(Base):
     __tablename__ = "item_borrowing_transactions"
     id : Mapped[int] = mapped_column(Integer, primary_key=True, nullable=False)
-    item_borrowing_request_id : Mapped[int] = mapped_column(Integer, ForeignKey("item_borrowing_requests.id", ondelete="CASCADE"), nullable=False)
+    item_borrowing_request_id : Mapped[int] = mapped_column(Integer, ForeignKey("item_borrowing_requests.id", ondelete="CASCADE"), nullable=False, index=True)
     processed_at : Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
-    operator_id : Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    operator_id : Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
     status : Mapped[BorrowStatus] = mapped_column(SQLEnum(BorrowStatus, name="borrowstatus", create_type=True), nullable=False)
     remarks : Mapped[Optional[str]] = mapped_column(String, nullable=True)
     item_borrowing_request : Mapped["ItemBorrowingRequest"] = relationship("ItemBorrowingRequest", back_populates="transactions")
@@ -122,8 +129,63 @@ class Logging(Base):
     created_at : Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
     tablename: Mapped[str] = mapped_column(String, nullable=False)
     operation: Mapped[str] = mapped_column(String, nullable=False)
-    who: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False)
+    who: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     new_val: Mapped[dict] = mapped_column(JSON, nullable=True)
     old_val: Mapped[dict] = mapped_column(JSON, nullable=True)
 
-    user: Mapped["User"] = relationship("User", back_populates="logs")
\ No newline at end of file
+    user: Mapped["User"] = relationship("User", back_populates="logs")
+
+# responses of retried writes (borrow, return, approval) keyed by the client's Idempotency-Key
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    endpoint: Mapped[str] = mapped_column(String, nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    response_body: Mapped[dict] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, index=True)
+
+
+# loans found past their return date by the overdue sweep
+class OverdueLoan(Base):
+    __tablename__ = "overdue_loans"
+    __table_args__ = (
+        Index("ix_overdue_loans_club_id_return_date", "club_id", "return_date"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    item_borrowing_request_id: Mapped[int] = mapped_column(Integer, ForeignKey("item_borrowing_requests.id", ondelete="CASCADE"), nullable=False, unique=True)
+    club_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("clubs.id", ondelete="CASCADE"), nullable=True)
+    return_date: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False)
+    detected_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+
+    item_borrowing_request: Mapped["ItemBorrowingRequest"] = relationship("ItemBorrowingRequest")
+
+
+# progress of background jobs that work through a table incrementally
+class JobCheckpoint(Base):
+    __tablename__ = "job_checkpoints"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    checkpoint_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    checkpoint_id: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text('0'))
+    # newest approval seen by the last complete run, where the next run's catch-up starts
+    checkpoint_transaction_id: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text('0'))
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'))
+
+
+# revoked tokens, mirrored in memory by every worker (auth/revocation.py). A row with a jti
+# revokes that refresh token, one without revokes every token of the user issued before it
+class TokenRevocation(Base):
+    __tablename__ = "token_revocations"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    jti: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, unique=True)
+    revoked_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, server_default=text('now()'), index=True)
+    # when the last token the row can apply to expires, the row is useless after that
+    expires_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), nullable=False, index=True)
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta, timezone
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from ..dependencies import require_global_role, require_club_role, is_club_exist, is_item_exist, require_member_role
@@ -13,8 +13,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import select
 
 from ..utils.log import log_operation
+from ..utils.idempotency import find_idempotent_response, save_idempotent_response
+from ..utils.scan import lock_item_by_qr, apply_borrow
+from ..utils.responses import ModelRoute
 
-router = APIRouter(prefix="/clubs/{club_id}/borrow", tags=["Club Management", "Borrowing"])
+router = APIRouter(prefix="/clubs/{club_id}/borrow", tags=["Club Management", "Borrowing"], route_class=ModelRoute)
 
 
 # def delete_item(
@@ -40,58 +43,43 @@ def borrow_item_by_qr(
     user: models.User = Depends(require_member_role()),
     club: models.Club = Depends(is_club_exist),
     db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
 ):
-    try:
-        item = (
-            db.execute(
-                select(models.Item)
-                .where(models.Item.qr_code == body.qr_code)
-                .with_for_update()
-            ).scalars().first()
-        )
-        if not item:
-            raise HTTPException(status_code=400, detail="Item with this QR code not found")
-        if item.club_id != club_id:
-            raise HTTPException(status_code=400, detail="Item does not belong to this club")
-        if item.status != models.ItemStatus.AVAILABLE:
-            raise HTTPException(status_code=400, detail="Item is not available for borrowing")
-        if body.return_date and body.return_date <= datetime.now(timezone.utc):
-            raise HTTPException(status_code=400, detail="Return date must be in the future")
+    endpoint = f"borrow:{club_id}"
+    # a retried scan gets the first response back without touching the item lock
+    replay = find_idempotent_response(db, key=idempotency_key, user_id=user.id, endpoint=endpoint)
+    if replay:
+        return replay
 
-        borrowing_request = models.ItemBorrowingRequest(
-            item_id=item.id,
-            borrower_id=user.id,
-            return_date=body.return_date or (datetime.now(timezone.utc) + timedelta(days=7)),
-        )
-
-        tx_status = (
-            models.BorrowStatus.PENDING_APPROVAL
-            if getattr(item, "is_high_risk", False)
-            else models.BorrowStatus.APPROVED
-        )
-
-        borrow_transaction = models.ItemBorrowingTransaction(
-            item_borrowing_request=borrowing_request,
-            status=tx_status,
-            operator_id=None,
+    try:
+        item = lock_item_by_qr(db, body.qr_code)
+        # a concurrent retry may have committed while we waited for the lock
+        replay = find_idempotent_response(db, key=idempotency_key, user_id=user.id, endpoint=endpoint)
+        if replay:
+            db.rollback()
+            return replay
+
+        resp, borrowing_request = apply_borrow(
+            db,
+            item,
+            club_id=club_id,
+            user_id=user.id,
+            return_date=body.return_date,
         )
 
-        item.status = models.ItemStatus.UNAVAILABLE
-        db.add_all([borrowing_request, borrow_transaction])
-
-
-        message = "Pending Approval" if getattr(item, "is_high_risk", False) else "Successfully borrowed"
-        resp = schemas.BorrowItemOut.model_validate(
-            {
-                "message": message,
-                "item_name": item.name, 
-            },
-            from_attributes=True,
+        save_idempotent_response(
+            db,
+            key=idempotency_key,
+            user_id=user.id,
+            endpoint=endpoint,
+            status_code=status.HTTP_201_CREATED,
+            body=resp.model_dump(mode="json"),
         )
 
         db.commit()
 
         log_operation(
+            db,
             who_id=user.id,
             tablename="item_borrowing_requests",
             operation = "BORROW_ITEM",
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
-from ..dependencies import require_global_role, require_club_role, is_club_exist, is_item_exist
+from fastapi.responses import ORJSONResponse
+from ..dependencies import require_global_role, require_club_role, is_club_exist, is_item_exist, sparse_fields
 from .. import models
 from .. import schemas
 from sqlalchemy.orm import Session
@@ -12,8 +12,11 @@ import logging
 from ..utils.upload_file import upload_file_to_s3, delete_old_file_from_s3, create_unique_filename
 from typing import List, Union
 from ..utils.log import log_operation
+from ..auth.claims import bump_membership_version
+from ..utils.responses import ModelRoute, sparse_response
+from ..utils.projections import MEMBER_FIELDS, club_member_rows
 
-router = APIRouter(prefix="/clubs", tags=["Club Management"])
+router = APIRouter(prefix="/clubs", tags=["Club Management"], route_class=ModelRoute)
 
 def is_existing_membership(user_id: int, club_id: int, db: Session):
     return db.query(models.Membership).filter(models.Membership.user_id == user_id, models.Membership.club_id == club_id).first()
@@ -25,7 +28,7 @@ def search_clubs_by_name(
     user: models.User = Depends(require_global_role(role=models.GlobalRoles.USER.value)),
     db: Session = Depends(get_db)
 ):
-    logging.info(f"Searching clubs with query: '{query}'")
+    logging.info("Searching clubs with query: '%s'", query)
     clubs_query = db.query(models.Club)
 
     if query.strip():
@@ -172,39 +175,24 @@ def delete_club_image(
 @router.get("/{club_id}/members", response_model=schemas.ClubMembersResponse)
 def get_club_members(
     club_id: int,
+    fields: tuple[str, ...] | None = Depends(sparse_fields(MEMBER_FIELDS)),
     user: models.User = Depends(require_club_role(role=models.ClubRoles.MEMBER.value)),
     db: Session = Depends(get_db)
 ):
-    query = (
-        db.query(models.User)
-        .join(models.Membership, models.User.id == models.Membership.user_id)
-        .filter(models.Membership.club_id == club_id)
-    )
+    members = club_member_rows(db, club_id, fields)
 
-    total_members = query.count()
-    members = query.all()
-
-    if total_members == 0:
+    if not members:
         return schemas.ClubMembersResponse(
             message="No members found in this club.",
             total_members=0,
             data=[]
         )
 
-    members_data = [
-        schemas.ClubMembersOut(
-            user_id=member.id,
-            name=member.name,
-            email=member.email
-        )
-        for member in members
-    ]
-
-    return schemas.ClubMembersResponse(
-        message="Successfully retrieved club members.",
-        total_members=total_members,
-        data=members_data
-    )
+    return sparse_response(schemas.ClubMembersResponse, fields, {
+        "message": "Successfully retrieved club members.",
+        "total_members": len(members),
+        "data": members,
+    })
 
 # Get a single user membership from a club
 @router.get("/{club_id}/members/{user_id}", response_model=schemas.ClubMembersOut)
@@ -244,8 +232,12 @@ def set_roles(club_id: int,
                 
             old_data = existing_member.__dict__
             existing_member.role = set_role.role.value
+            bump_membership_version(db, user_id)
             db.commit()
             db.refresh(existing_member)
+            # the row's columns as stored (role as its number); encoded before log_operation's
+            # commit expires them
+            content = jsonable_encoder(existing_member)
 
             log_operation(
                 db,
@@ -255,12 +247,14 @@ def set_roles(club_id: int,
                 old_val=old_data,
                 new_val=existing_member
             )
-            return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(existing_member))
+            return ORJSONResponse(status_code=status.HTTP_200_OK, content=content)
         
     new_membership = models.Membership(user_id=user_id, club_id=club_id, role=set_role.role.value)
     db.add(new_membership)
+    bump_membership_version(db, user_id)
     db.commit()
     db.refresh(new_membership)
+    content = jsonable_encoder(new_membership)
     
     log_operation(
         db,
@@ -270,7 +264,7 @@ def set_roles(club_id: int,
         new_val=new_membership
     )
 
-    return JSONResponse(status_code=status.HTTP_201_CREATED, content=jsonable_encoder(new_membership))
+    return ORJSONResponse(status_code=status.HTTP_201_CREATED, content=content)
 
 # remove a user from a club
 @router.delete("/{club_id}/roles/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -291,6 +285,7 @@ def remove_member(club_id: int, user_id: int,
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient Permissions to remove this user")
         
         db.delete(existing_member)
+        bump_membership_version(db, user_id)
         db.commit()
 
         log_operation(
@@ -322,11 +317,11 @@ def add_item(club_id : int,
         new_val=new_item
     )
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_201_CREATED,
         content={
             "message": "Successfully added item",
-            "data": jsonable_encoder(new_item)
+            "data": schemas.ItemOut.model_validate(new_item).model_dump(mode="json")
         }
     )
 
@@ -358,11 +353,11 @@ def update_item(club_id : int,
         new_val=item
     )
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_200_OK,
         content={
             "message": "Successfully updated item",
-            "data": jsonable_encoder(item)
+            "data": schemas.ItemOut.model_validate(item).model_dump(mode="json")
         }
     )   
 
@@ -412,7 +407,7 @@ def upload_item_images(
         "images": uploaded_images
     }
 
-    return JSONResponse(content=response_data, status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=response_data, status_code=status.HTTP_200_OK)
 
 # superuser/admin can delete image(s) of an item (by image URL)
 @router.delete("/{club_id}/items/{item_id}/delete-images", status_code=status.HTTP_200_OK)
@@ -488,7 +483,7 @@ def get_club_details(
         }
     }
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_200_OK,
         content=response_content
     )
@@ -501,7 +496,7 @@ def get_all_clubs(
     clubs = db.query(models.Club).order_by(models.Club.id.asc()).all()
 
     if not clubs:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "message": "No clubs found.",
@@ -524,7 +519,7 @@ def get_all_clubs(
             "total_members": member_count
         })
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_200_OK,
         content={
             "message": "Successfully retrieved all clubs.",
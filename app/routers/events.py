@@ -0,0 +1,47 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from ..dependencies import is_club_exist, require_club_role
+from .. import models
+import logging
+from ..utils.events import broadcaster
+from ..utils.lifecycle import draining
+
+router = APIRouter(prefix="/clubs/{club_id}/events", tags=["Club Management", "Events"])
+
+# seconds between keep-alive comments, keeps proxies from closing an idle stream
+HEARTBEAT_INTERVAL = 15
+
+
+# server-sent events for moderator dashboards: item status changes and approval queue updates
+@router.get("")
+async def stream_club_events(
+    club_id: int,
+    request: Request,
+    club: models.Club = Depends(is_club_exist),
+    user: models.User = Depends(require_club_role(role=models.ClubRoles.MODERATOR.value)),
+):
+    logging.info("Club event stream opened: club_id=%s, user_id=%s", club_id, user.id)
+    queue = broadcaster.subscribe(club_id)
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            # end the stream when the worker drains, the client reconnects (retry) elsewhere
+            while not draining.is_set() and not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broadcaster.unsubscribe(club_id, queue)
+            logging.info("Club event stream closed: club_id=%s, user_id=%s", club_id, user.id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
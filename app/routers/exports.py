@@ -0,0 +1,120 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from ..dependencies import is_club_exist, require_club_role
+from .. import models
+from ..database import SessionLocal
+import logging
+from ..utils.export import stream_csv, stream_ndjson
+
+router = APIRouter(prefix="/clubs/{club_id}/export", tags=["Club Management", "Export"])
+
+# rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+ITEM_COLUMNS = ["id", "name", "description", "status", "is_high_risk", "qr_code", "created_at"]
+
+TRANSACTION_COLUMNS = [
+    "transaction_id",
+    "item_borrowing_request_id",
+    "item_id",
+    "item_name",
+    "item_qr_code",
+    "borrower_id",
+    "borrower_name",
+    "status",
+    "operator_id",
+    "remarks",
+    "processed_at",
+    "borrow_date",
+    "return_date",
+]
+
+
+def _stream_partitions(stmt):
+    # the export outlives the request scoped session, so the cursor gets its own session
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _export_response(stmt, columns: list[str], format: str, filename: str):
+    encoder = stream_csv if format == "csv" else stream_ndjson
+    return StreamingResponse(
+        encoder(_stream_partitions(stmt), columns),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
+
+
+# stream every item of a club (admin/superuser only)
+@router.get("/items")
+def export_club_items(
+    club_id: int,
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Export format"),
+    club: models.Club = Depends(is_club_exist),
+    user: models.User = Depends(require_club_role(role=models.ClubRoles.ADMIN.value)),
+):
+    logging.info("Exporting items for club_id=%s as %s, requested by user_id=%s", club_id, format, user.id)
+
+    stmt = (
+        select(
+            models.Item.id,
+            models.Item.name,
+            models.Item.description,
+            models.Item.status,
+            models.Item.is_high_risk,
+            models.Item.qr_code,
+            models.Item.created_at,
+        )
+        .where(models.Item.club_id == club_id)
+        .order_by(models.Item.id.asc())
+    )
+
+    return _export_response(stmt, ITEM_COLUMNS, format, f"club_{club_id}_items")
+
+
+# stream the full borrowing transaction history of a club (admin/superuser only)
+@router.get("/transactions")
+def export_club_transactions(
+    club_id: int,
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Export format"),
+    club: models.Club = Depends(is_club_exist),
+    user: models.User = Depends(require_club_role(role=models.ClubRoles.ADMIN.value)),
+):
+    logging.info("Exporting transactions for club_id=%s as %s, requested by user_id=%s", club_id, format, user.id)
+
+    stmt = (
+        select(
+            models.ItemBorrowingTransaction.id,
+            models.ItemBorrowingTransaction.item_borrowing_request_id,
+            models.Item.id,
+            models.Item.name,
+            models.Item.qr_code,
+            models.ItemBorrowingRequest.borrower_id,
+            models.User.name,
+            models.ItemBorrowingTransaction.status,
+            models.ItemBorrowingTransaction.operator_id,
+            models.ItemBorrowingTransaction.remarks,
+            models.ItemBorrowingTransaction.processed_at,
+            models.ItemBorrowingRequest.created_at,
+            models.ItemBorrowingRequest.return_date,
+        )
+        .join(models.ItemBorrowingRequest, models.ItemBorrowingTransaction.item_borrowing_request_id == models.ItemBorrowingRequest.id)
+        .join(models.Item, models.ItemBorrowingRequest.item_id == models.Item.id)
+        .outerjoin(models.User, models.ItemBorrowingRequest.borrower_id == models.User.id)
+        .where(models.Item.club_id == club_id)
+        .order_by(models.ItemBorrowingTransaction.id.asc())
+    )
+
+    return _export_response(stmt, TRANSACTION_COLUMNS, format, f"club_{club_id}_transactions")
@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, Query, UploadFile, File
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, Query, UploadFile, File
 from sqlalchemy import Enum, select, func, or_
-from ..dependencies import require_global_role, is_item_exist, is_club_exist, require_club_role
+from ..dependencies import require_global_role, is_item_exist, is_club_exist, require_club_role, sparse_fields
 from .. import models
 from .. import schemas
 from sqlalchemy.orm import Session, joinedload, selectinload
@@ -9,10 +9,14 @@ from fastapi import status
 import logging
 from typing import List, Union
 from ..utils.upload_file import upload_file_to_s3, delete_old_file_from_s3, create_unique_filename
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from ..utils.log import log_operation
+from ..utils.idempotency import find_idempotent_response, save_idempotent_response
+from ..utils.events import publish_club_event
+from ..utils.responses import ModelRoute, sparse_response
+from ..utils.projections import ITEM_FIELDS, club_item_rows
 
-router = APIRouter(prefix="/items", tags=["Item Management"])
+router = APIRouter(prefix="/items", tags=["Item Management"], route_class=ModelRoute)
 
 
 # Create an item without a club (requires SUPERUSER role)
@@ -80,7 +84,7 @@ def upload_item_images(
         "images": uploaded_images
     }
 
-    return JSONResponse(content=response_data, status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=response_data, status_code=status.HTTP_200_OK)
 
 # superuser can delete image(s) of an item (by image URL)
 @router.delete("/{item_id}/delete-images", status_code=status.HTTP_200_OK)
@@ -226,8 +230,14 @@ def approve_item_transaction(
     approve: schemas.ApproveIn,
     user: models.User = Depends(require_global_role(role=models.GlobalRoles.USER.value)),
     db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
 ):
-    logging.info(f"Approval request received: club_id={club_id}, transaction_id={transaction_id}")
+    logging.info("Approval request received: club_id=%s, transaction_id=%s", club_id, transaction_id)
+
+    endpoint = f"approve:{transaction_id}"
+    replay = find_idempotent_response(db, key=idempotency_key, user_id=user.id, endpoint=endpoint)
+    if replay:
+        return replay
 
     try:
         transaction = (
@@ -250,9 +260,9 @@ def approve_item_transaction(
         item = borrow_request.item
         borrower = borrow_request.borrower
 
-        logging.debug(f"Transaction fetched: {transaction.id}, Status: {transaction.status}")
-        logging.debug(f"Item: ({item.id}, '{item.name}'), Club: ({item.club.id}, '{item.club.name}')")
-        logging.debug(f"Approver: ({user.id}, '{user.name}'), Global role: {user.global_role}")
+        logging.debug("Transaction fetched: %s, Status: %s", transaction.id, transaction.status)
+        logging.debug("Item: (%s, '%s'), Club: (%s, '%s')", item.id, item.name, item.club.id, item.club.name)
+        logging.debug("Approver: %s, Global role: %s", user.id, user.global_role)
 
         if user.global_role == models.GlobalRoles.SUPERUSER.value:
             logging.debug("Superuser detected — bypassing club role check.")
@@ -275,7 +285,7 @@ def approve_item_transaction(
                     detail="Only moderators or superusers can approve transactions."
                 )
 
-            logging.debug(f"Membership verified: Role {role_value} (Moderator)")
+            logging.debug("Membership verified: Role %s (Moderator)", role_value)
 
         current_status = transaction.status
         action = approve.action.lower()
@@ -323,6 +333,25 @@ def approve_item_transaction(
             from_attributes=True,
         )
 
+        publish_club_event(
+            db,
+            item.club_id,
+            "approval",
+            item_id=item.id,
+            item_status=item.status.value,
+            transaction_id=transaction.id,
+            transaction_status=transaction.status.value,
+        )
+
+        save_idempotent_response(
+            db,
+            key=idempotency_key,
+            user_id=user.id,
+            endpoint=endpoint,
+            status_code=status.HTTP_200_OK,
+            body=resp.model_dump(mode="json"),
+        )
+
         db.commit()
 
         log_operation(
@@ -340,7 +369,7 @@ def approve_item_transaction(
         raise
     except Exception as e:
         db.rollback()
-        logging.exception(f"Unexpected error: {e}")
+        logging.exception("Unexpected error: %s", e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
 
 @router.get(
@@ -353,50 +382,24 @@ def get_or_search_items_in_club(
     query: str | None = Query(None, description="Search keyword (optional, matches name or description)"),
     skip: int = Query(0, ge=0, description="Number of items to skip"),
     limit: int = Query(10, gt=0, le=100, description="Number of items to return per page"),
+    fields: tuple[str, ...] | None = Depends(sparse_fields(ITEM_FIELDS)),
     user: models.User = Depends(require_club_role(role=models.ClubRoles.MEMBER.value)),
     club: models.Club = Depends(is_club_exist),
     db: Session = Depends(get_db),
 ):
 
-    logging.info(f"Fetching items for club_id={club_id}, query='{query}'")
+    logging.info("Fetching items for club_id=%s, query='%s'", club_id, query)
 
-    q = db.query(models.Item).options(selectinload(models.Item.images)).filter(models.Item.club_id == club_id)
-
-    if query:
-        q = q.filter(
-            or_(
-                models.Item.name.ilike(f"%{query}%"),
-                models.Item.description.ilike(f"%{query}%")
-            )
-        )
-
-    items = q.order_by(models.Item.id.asc()).offset(skip).limit(limit).all()
+    items = club_item_rows(db, club_id, query=query, skip=skip, limit=limit, fields=fields)
 
     if not items:
         logging.info("No items found for this club.")
         return schemas.ItemSearchResponse(message="No items found.", data=[])
 
-    results = []
-    for item in items:
-        image_urls = [img.image_url for img in item.images] if item.images else []
-        logging.info(f"Item {item.id} ({item.name}) has {len(image_urls)} image(s): {image_urls}")
-
-        results.append(
-            schemas.ItemSearchOut(
-                id=item.id,
-                name=item.name,
-                description=item.description,
-                status=item.status.value if hasattr(item.status, "value") else item.status,
-                is_high_risk=item.is_high_risk,
-                qr_code=getattr(item, "qr_code", None),
-                images=image_urls
-            )
-        )
-
-    return schemas.ItemSearchResponse(
-        message="Successfully retrieved items." if not query else "Successfully retrieved search results.",
-        data=results
-    )
+    return sparse_response(schemas.ItemSearchResponse, fields, {
+        "message": "Successfully retrieved items." if not query else "Successfully retrieved search results.",
+        "data": items,
+    })
 
 @router.get("/{item_id}", response_model=schemas.ItemOut)
 def get_item_detail(
@@ -439,7 +442,7 @@ def get_latest_pending_transactions(
     skip: int = Query(0, ge=0, description="Number of records to skip for pagination"),
     limit: int = Query(10, gt=0, le=100, description="Number of records to return per page"),
 ):
-    logging.info(f"Fetching latest pending approvals for club_id={club_id}, skip={skip}, limit={limit}")
+    logging.info("Fetching latest pending approvals for club_id=%s, skip=%s, limit=%s", club_id, skip, limit)
 
     try:
         if user.global_role == models.GlobalRoles.SUPERUSER.value:
@@ -455,14 +458,14 @@ def get_latest_pending_transactions(
             )
 
             role_value = membership.role.value if hasattr(membership.role, "value") else membership.role
-            logging.debug(f"User membership role in club {club_id}: {role_value}")
+            logging.debug("User membership role in club %s: %s", club_id, role_value)
             if role_value != models.ClubRoles.MODERATOR.value:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Only moderators or superusers can approve transactions."
                 )
 
-            logging.debug(f"Membership verified: Role {role_value} (Moderator)")
+            logging.debug("Membership verified: Role %s (Moderator)", role_value)
 
         subq = (
             select(
@@ -537,5 +540,5 @@ def get_latest_pending_transactions(
     except HTTPException:
         raise
     except Exception as e:
-        logging.exception(f"Unexpected error while fetching approvals for club {club_id}: {e}")
+        logging.exception("Unexpected error while fetching approvals for club %s: %s", club_id, e)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
\ No newline at end of file
@@ -1,14 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from ..database import get_db
 from .. import models 
 from ..schemas import User as UserSchema
-from ..auth.google import oauth
+from ..auth.google import oauth, allowed_redirect, create_login_state, read_login_state
+from authlib.integrations.starlette_client import OAuthError
 from starlette.requests import Request
 from starlette.responses import RedirectResponse
 from ..config import settings
-from ..auth.google import oauth
-from ..auth.oauth import create_jwt
+from ..auth.oauth import LOGIN_CODE, REFRESH_TOKEN, create_access_token, create_login_code, create_token_pair, decode_token
+from ..auth.revocation import revoke_token, revoke_user
+from ..auth.claims import club_role_claims
+from .. import schemas
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+import jwt
+import logging
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -16,45 +25,126 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 async def google_login(request: Request, redirect: str | None = None):
     # print("Session before login:", request.session)
     redirect_uri = settings.GOOGLE_REDIRECT_URI
-    
-    state_value = redirect
-    
-    return await oauth.google.authorize_redirect(request, redirect_uri, state=state_value)
+
+    # the tokens end up in this URL, so it has to be one of our frontends
+    if redirect is not None and not allowed_redirect(redirect):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Redirect URL not allowed")
+
+    return await oauth.google.authorize_redirect(request, redirect_uri, state=create_login_state(redirect))
 
 @router.get("/google/callback")
 async def auth_callback(request: Request, db: Session = Depends(get_db)):
     # print("Session on callback:", request.session)
-    token = await oauth.google.authorize_access_token(request)
+    # checked before the code exchange, a forged or stale callback costs no call to Google
+    try:
+        login_state = read_login_state(request.query_params.get("state"))
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Login expired, please sign in again")
+
+    try:
+        token = await oauth.google.authorize_access_token(request)
+    except OAuthError:
+        # no login data in this browser's session (started elsewhere or expired) or refused by Google
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Login failed, please sign in again")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
 
     user_info = token.get("userinfo")
     if not user_info:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid Credentials")
     
-    # print(user_info)
-    user = db.query(models.User).filter(models.User.provider_id == user_info["sub"]).first()
-    # create the user if not present
-    if not user:
-        user = models.User(
-            name = user_info["name"],
-            picture=user_info["picture"],
-            email=user_info["email"],
-            provider_id=user_info["sub"],
-            provider="google",
-            # set default role to USER (.value converts the enum to its underlying integer value that the database expects.)
-            global_role=models.GlobalRoles.USER.value
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    jwt_token = create_jwt(user.id)
-    
-    # uncomment for frontend
-    state = request.query_params.get("state")
+    # one statement for new and returning users: concurrent first logins can't race on the
+    # unique provider_id, and returning users get their current name and picture. The row is
+    # updated even when nothing changed, a WHERE on the update would leave RETURNING empty.
+    stmt = insert(models.User).values(
+        name=user_info["name"],
+        picture=user_info.get("picture"),
+        email=user_info["email"],
+        provider_id=user_info["sub"],
+        provider="google",
+        # set default role to USER (.value converts the enum to its underlying integer value that the database expects.)
+        global_role=models.GlobalRoles.USER.value,
+    )
+    user = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[models.User.provider_id],
+            set_={"name": stmt.excluded.name, "picture": stmt.excluded.picture},
+        ).returning(models.User.id, models.User.global_role, models.User.membership_version)
+    ).one()
+    db.commit()
+    club_claims = _club_claims(db, user)
 
-    frontend_redirect = state
-    
-    redirect_url = f"{frontend_redirect}?token={jwt_token}"
+    frontend_redirect = login_state["redirect"]
+    if not frontend_redirect:
+        return create_token_pair(user, club_claims)
+
+    # no refresh token in the URL: the frontend trades the one-time code for it at /auth/token
+    access_token = create_access_token(user.id, user.global_role, user.membership_version, club_claims)
+    redirect_url = f"{frontend_redirect}?{urlencode({'token': access_token, 'code': create_login_code(user.id)})}"
 
     return RedirectResponse(url=redirect_url)
-    
-    return {"access_token": jwt_token, "token_type": "bearer"}
\ No newline at end of file
+
+
+def _club_claims(db: Session, user) -> dict[str, int] | None:
+    # superusers pass every club check without them; `user` was read first, so the roles
+    # are at least as new as its membership_version
+    if user.global_role == models.GlobalRoles.SUPERUSER.value:
+        return None
+    return club_role_claims(db, user.id)
+
+
+def _single_use_payload(token: str, token_type: str, name: str) -> dict:
+    try:
+        return decode_token(token, token_type)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"{name.capitalize()} has expired")
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid {name}")
+
+
+def _refresh_payload(refresh_token: str) -> dict:
+    return _single_use_payload(refresh_token, REFRESH_TOKEN, "refresh token")
+
+
+def _redeem(db: Session, payload: dict, name: str) -> dict:
+    """Revokes the used refresh token or login code and returns a new pair for its user."""
+    user = db.execute(
+        select(models.User.id, models.User.global_role, models.User.membership_version)
+        .where(models.User.id == int(payload["user_id"]))
+    ).first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+
+    # the unique jti makes this safe against two workers redeeming the same token
+    if not revoke_token(db, user.id, payload["jti"], datetime.fromtimestamp(payload["exp"], timezone.utc)):
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Invalid {name}")
+    db.commit()
+    return create_token_pair(user, _club_claims(db, user))
+
+
+# Trade the one-time code from the login redirect for the first token pair.
+@router.post("/token", response_model=schemas.TokenPair)
+def exchange_login_code(body: schemas.LoginCodeIn, db: Session = Depends(get_db)):
+    return _redeem(db, _single_use_payload(body.code, LOGIN_CODE, "login code"), "login code")
+
+
+# Trade a refresh token for a new pair. The used refresh token is revoked (rotation), so a
+# copy of it is rejected; the new access token carries the user's current role.
+@router.post("/refresh", response_model=schemas.TokenPair)
+def refresh_tokens(body: schemas.RefreshTokenIn, db: Session = Depends(get_db)):
+    return _redeem(db, _refresh_payload(body.refresh_token), "refresh token")
+
+
+# Revoke the refresh token (and with `everywhere`, every token of the user). Access tokens
+# already handed out stay valid until they expire unless `everywhere` is set.
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(body: schemas.LogoutIn, db: Session = Depends(get_db)):
+    payload = _refresh_payload(body.refresh_token)
+    user_id = int(payload["user_id"])
+
+    revoke_token(db, user_id, payload["jti"], datetime.fromtimestamp(payload["exp"], timezone.utc))
+    if body.everywhere:
+        revoke_user(db, user_id)
+    db.commit()
+    logging.info("User %s logged out%s", user_id, " everywhere" if body.everywhere else "")
\ No newline at end of file
@@ -0,0 +1,22 @@
+import hmac
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from ..config import settings
+from ..utils.metrics import registry
+
+router = APIRouter(tags=["Monitoring"])
+
+scrape_auth = HTTPBearer(auto_error=False)
+
+
+def require_scrape_token(credentials: HTTPAuthorizationCredentials | None = Depends(scrape_auth)):
+    # main.py only mounts the router when METRICS_TOKEN is set
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid scrape token", headers={"WWW-Authenticate": "Bearer"})
+
+
+# Prometheus scrape endpoint (authorization: credentials: <METRICS_TOKEN> in the scrape config)
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False, dependencies=[Depends(require_scrape_token)])
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
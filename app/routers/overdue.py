@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from ..dependencies import is_club_exist, require_club_role
+from .. import models
+from .. import schemas
+from ..database import get_db
+from ..utils.responses import ModelRoute
+from ..utils.projections import latest_transaction_status
+from fastapi import status
+import logging
+
+router = APIRouter(prefix="/clubs/{club_id}/overdue", tags=["Club Management", "Borrowing"], route_class=ModelRoute)
+
+
+# loans of the club marked overdue by the background sweep, handed over and still not returned
+@router.get("", response_model=schemas.OverdueLoanResponse, status_code=status.HTTP_200_OK)
+def get_overdue_loans(
+    club_id: int,
+    skip: int = Query(0, ge=0, description="Number of records to skip for pagination"),
+    limit: int = Query(10, gt=0, le=100, description="Number of records to return per page"),
+    club: models.Club = Depends(is_club_exist),
+    user: models.User = Depends(require_club_role(role=models.ClubRoles.MODERATOR.value)),
+    db: Session = Depends(get_db),
+):
+    logging.info("Fetching overdue loans for club_id=%s, skip=%s, limit=%s", club_id, skip, limit)
+
+    rows = db.execute(
+        select(
+            models.ItemBorrowingRequest.id.label("request_id"),
+            models.Item.id.label("item_id"),
+            models.Item.name.label("item_name"),
+            models.Item.qr_code.label("item_qr_code"),
+            models.User.id.label("borrower_id"),
+            models.User.name.label("borrower_name"),
+            models.User.email.label("borrower_email"),
+            models.ItemBorrowingRequest.created_at.label("borrow_date"),
+            models.OverdueLoan.return_date,
+            models.OverdueLoan.detected_at,
+        )
+        .join(models.ItemBorrowingRequest, models.OverdueLoan.item_borrowing_request_id == models.ItemBorrowingRequest.id)
+        .join(models.Item, models.ItemBorrowingRequest.item_id == models.Item.id)
+        .join(models.User, models.ItemBorrowingRequest.borrower_id == models.User.id)
+        .where(
+            models.OverdueLoan.club_id == club_id,
+            models.ItemBorrowingRequest.returned_at.is_(None),
+            latest_transaction_status == models.BorrowStatus.APPROVED,
+        )
+        .order_by(models.OverdueLoan.return_date.asc(), models.OverdueLoan.id.asc())
+        .offset(skip)
+        .limit(limit)
+    ).all()
+
+    if not rows:
+        return schemas.OverdueLoanResponse(message="No overdue loans found.", data=[])
+
+    return schemas.OverdueLoanResponse(
+        message="Successfully retrieved overdue loans.",
+        data=[schemas.OverdueLoanItem(**row._mapping) for row in rows],
+    )
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, status
+from ..dependencies import require_global_role
+from .. import models
+from .. import schemas
+import logging
+from ..middleware.profiling import toggle
+from ..utils.responses import ModelRoute
+
+router = APIRouter(prefix="/admin/profiling", tags=["Admin"], route_class=ModelRoute)
+
+
+# current sampling state of the worker that answers
+@router.get("", response_model=schemas.ProfilingToggleOut, status_code=status.HTTP_200_OK)
+def get_profiling(user: models.User = Depends(require_global_role(role=models.GlobalRoles.SUPERUSER.value))):
+    return schemas.ProfilingToggleOut(sample_rate=toggle.sample_rate, path_prefix=toggle.path_prefix, expires_at=toggle.expires_at)
+
+
+# switch request sampling on/off; the toggle lives in memory, so it applies to the worker that
+# answers (run a single worker, or use the signed X-Profile header, to target a request)
+@router.put("", response_model=schemas.ProfilingToggleOut, status_code=status.HTTP_200_OK)
+def set_profiling(
+    body: schemas.ProfilingToggleIn,
+    user: models.User = Depends(require_global_role(role=models.GlobalRoles.SUPERUSER.value)),
+):
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=body.minutes)
+    toggle.set(body.sample_rate, body.path_prefix, expires_at)
+    logging.info("Profiling sample rate set to %s for %s (user_id=%s, until %s)", body.sample_rate, body.path_prefix or "all paths", user.id, expires_at)
+    return schemas.ProfilingToggleOut(sample_rate=toggle.sample_rate, path_prefix=toggle.path_prefix, expires_at=toggle.expires_at)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from ..dependencies import is_club_exist, require_member_role
 from .. import models
 from .. import schemas
@@ -7,10 +7,12 @@ from ..database import get_db
 from fastapi import status
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, desc
 from ..utils.log import log_operation
+from ..utils.idempotency import find_idempotent_response, save_idempotent_response
+from ..utils.scan import lock_item_by_qr, apply_return
+from ..utils.responses import ModelRoute
 
-router = APIRouter(prefix="/clubs/{club_id}/return", tags=["Club Management", "Return"])
+router = APIRouter(prefix="/clubs/{club_id}/return", tags=["Club Management", "Return"], route_class=ModelRoute)
 
 @router.post("", status_code=status.HTTP_201_CREATED, response_model=schemas.BorrowItemOut)
 def return_item_by_qr(
@@ -19,54 +21,34 @@ def return_item_by_qr(
     club: models.Club = Depends(is_club_exist),
     user: models.User = Depends(require_member_role()),
     db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(None, alias="Idempotency-Key", max_length=255),
 ):
-    try:
-        logging.info(f"Return request received: club_id={club_id}, user_id={user.id}, qr_code={body.qr_code}")
-        item = (
-            db.execute(
-                select(models.Item)
-                .where(models.Item.qr_code == body.qr_code)
-                .with_for_update()
-            ).scalars().first()
-        )
-        logging.info(f"Item fetched for return: {item.id, item.name}")
+    endpoint = f"return:{club_id}"
+    # a retried scan gets the first response back without touching the item lock
+    replay = find_idempotent_response(db, key=idempotency_key, user_id=user.id, endpoint=endpoint)
+    if replay:
+        return replay
 
-        if not item:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item with this QR code not found")
-        if item.club_id != club_id:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item does not belong to this club")
-        if item.status != models.ItemStatus.UNAVAILABLE:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item is not currently borrowed")
+    try:
+        logging.info("Return request received: club_id=%s, user_id=%s, qr_code=%s", club_id, user.id, body.qr_code)
+        item = lock_item_by_qr(db, body.qr_code)
+        # a concurrent retry may have committed while we waited for the lock
+        replay = find_idempotent_response(db, key=idempotency_key, user_id=user.id, endpoint=endpoint)
+        if replay:
+            db.rollback()
+            return replay
 
-        borrowing_transaction= (
-            db.execute(
-                select(models.ItemBorrowingTransaction)
-                .join(models.ItemBorrowingRequest)
-                .where(models.ItemBorrowingRequest.item_id == item.id)
-                .order_by(desc(models.ItemBorrowingTransaction.processed_at))
-        )).scalars().first()
-        logging.info(f"Borrowing transaction fetched for return: {borrowing_transaction.id, borrowing_transaction.status}")
+        resp, return_transaction = apply_return(db, item, club_id=club_id, user_id=user.id)
+        logging.info("Return recorded for item: %s", (item.id, item.name))
 
-        if borrowing_transaction.status != models.BorrowStatus.APPROVED:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item borrowing not approved yet")
-        
-        if borrowing_transaction.item_borrowing_request.borrower_id != user.id:
-            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to return this item")
-        
-        return_status = (models.BorrowStatus.PENDING_CONDITION_CHECK if item.is_high_risk 
-                         else models.BorrowStatus.COMPLETED)
-        
-        return_transaction = models.ItemBorrowingTransaction(
-            item_borrowing_request_id= borrowing_transaction.item_borrowing_request_id,
-            operator_id = None,
-            status= return_status,
-            remarks = "Item returned, pending condition check" if item.is_high_risk else "Item returned by user"
+        save_idempotent_response(
+            db,
+            key=idempotency_key,
+            user_id=user.id,
+            endpoint=endpoint,
+            status_code=status.HTTP_201_CREATED,
+            body=resp.model_dump(mode="json"),
         )
-
-        if not item.is_high_risk:
-            item.status = models.ItemStatus.AVAILABLE
-
-        db.add(return_transaction)
         db.commit()
 
         log_operation(
@@ -77,20 +59,16 @@ def return_item_by_qr(
             old_val={"item_id": item.id, "previous_status": str(models.BorrowStatus.APPROVED)},
             new_val={
                 "item_id": item.id,
-                "new_status": str(return_status),
+                "new_status": str(return_transaction.status),
                 "remarks": return_transaction.remarks
             },
         )
 
-        message = "Item returned, pending condition check" if item.is_high_risk else "Item successfully returned"
-
-        resp = schemas.BorrowItemOut.model_validate(
-            {"message": message, "item_name": item.name},
-            from_attributes=True,
-        )   
-
         return resp
-        
+
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Internal Server Error")
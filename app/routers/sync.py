@@ -0,0 +1,166 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from ..dependencies import is_club_exist, require_member_role
+from .. import models
+from .. import schemas
+from ..database import get_db
+import logging
+from ..utils.log import log_operation
+from ..utils.idempotency import find_idempotency_record, save_idempotent_response
+from ..utils.scan import lock_item_by_qr, apply_borrow, apply_return
+from ..utils.responses import ModelRoute
+
+router = APIRouter(prefix="/clubs/{club_id}/sync", tags=["Club Management", "Borrowing", "Return"], route_class=ModelRoute)
+
+
+def replay_scan_event(
+    db: Session,
+    event: schemas.ScanEventIn,
+    *,
+    club_id: int,
+    device_id: str,
+    user: models.User,
+    now: datetime,
+) -> schemas.ScanEventOutcome:
+    key = f"{device_id}:{event.event_id}"
+    endpoint = f"sync:{club_id}"
+
+    try:
+        record = find_idempotency_record(db, key=key, user_id=user.id, endpoint=endpoint)
+    except HTTPException as e:
+        return schemas.ScanEventOutcome(
+            event_id=event.event_id,
+            action=event.action,
+            outcome="rejected",
+            status_code=e.status_code,
+            message=e.detail,
+        )
+
+    # the event was already synced by an earlier batch, hand back the same outcome
+    if record:
+        return schemas.ScanEventOutcome(**{**record.response_body, "replayed": True})
+
+    # device clocks can run ahead, a scan can't have happened after we received it
+    occurred_at = min(event.occurred_at, now)
+
+    item = None
+    savepoint = db.begin_nested()
+    try:
+        item = lock_item_by_qr(db, event.qr_code)
+
+        if event.action == "borrow":
+            resp, borrowing_request = apply_borrow(
+                db,
+                item,
+                club_id=club_id,
+                user_id=user.id,
+                return_date=event.return_date,
+                occurred_at=occurred_at,
+            )
+            db.flush()
+            log_operation(
+                db,
+                tablename="item_borrowing_requests",
+                operation="BORROW_ITEM",
+                who_id=user.id,
+                new_val=borrowing_request,
+                commit=False,
+            )
+        else:
+            resp, return_transaction = apply_return(
+                db,
+                item,
+                club_id=club_id,
+                user_id=user.id,
+            )
+            log_operation(
+                db,
+                tablename="item_borrowing_transactions",
+                operation="RETURN",
+                who_id=user.id,
+                old_val={"item_id": item.id, "previous_status": str(models.BorrowStatus.APPROVED)},
+                new_val={
+                    "item_id": item.id,
+                    "new_status": str(return_transaction.status),
+                    "remarks": return_transaction.remarks
+                },
+                commit=False,
+            )
+
+        savepoint.commit()
+        outcome = schemas.ScanEventOutcome(
+            event_id=event.event_id,
+            action=event.action,
+            outcome="applied",
+            status_code=status.HTTP_201_CREATED,
+            message=resp.message,
+            item_name=resp.item_name,
+        )
+    except HTTPException as e:
+        savepoint.rollback()
+        outcome = schemas.ScanEventOutcome(
+            event_id=event.event_id,
+            action=event.action,
+            outcome="rejected",
+            status_code=e.status_code,
+            message=e.detail,
+            item_name=item.name if item else None,
+        )
+
+    # rejections are stored too, so re-sending a batch always yields the same outcomes
+    save_idempotent_response(
+        db,
+        key=key,
+        user_id=user.id,
+        endpoint=endpoint,
+        status_code=outcome.status_code,
+        body=outcome.model_dump(mode="json"),
+    )
+    db.flush()
+
+    return outcome
+
+
+"""
+Replays the scans a kiosk queued while offline, all in one transaction.
+Conflicts are resolved deterministically: events are applied in device time order (ties keep
+their batch order), and a scan that no longer fits the item's state (e.g. the item was borrowed
+online in the meantime) is rejected with the same error the live borrow/return route gives,
+without affecting the other events. Every outcome is stored by event_id, so a batch re-sent
+after a dropped connection gets identical results instead of double borrows.
+"""
+@router.post("", status_code=status.HTTP_200_OK, response_model=schemas.ScanBatchResponse)
+def sync_scan_events(
+    club_id: int,
+    batch: schemas.ScanBatchIn,
+    club: models.Club = Depends(is_club_exist),
+    user: models.User = Depends(require_member_role()),
+    db: Session = Depends(get_db),
+):
+    logging.info("Scan sync received: club_id=%s, device_id=%s, events=%s", club_id, batch.device_id, len(batch.events))
+
+    now = datetime.now(timezone.utc)
+    # sorted() is stable, so events with the same timestamp keep their batch order
+    events = sorted(batch.events, key=lambda event: event.occurred_at)
+
+    try:
+        outcomes = [
+            replay_scan_event(db, event, club_id=club_id, device_id=batch.device_id, user=user, now=now)
+            for event in events
+        ]
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logging.exception("Unexpected error while syncing scans for club %s: %s", club_id, e)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal Server Error")
+
+    applied = sum(1 for outcome in outcomes if outcome.outcome == "applied")
+
+    return schemas.ScanBatchResponse(
+        message="Scan events synced.",
+        device_id=batch.device_id,
+        applied=applied,
+        rejected=len(outcomes) - applied,
+        data=outcomes,
+    )
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import func
-from ..dependencies import  require_global_role, is_club_exist, require_club_role
+from ..dependencies import  get_current_user, require_global_role, is_club_exist, require_club_role, sparse_fields
 from .. import models
 from sqlalchemy.orm import Session
 from ..database import get_db
@@ -8,26 +8,25 @@ from fastapi import status
 import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from .. import schemas
+from ..utils.responses import ModelRoute, sparse_response
+from ..utils.projections import (
+    CLUB_FIELDS, HISTORY_FIELDS, active_loan_rows, bootstrap_club_rows, borrow_history_rows, club_role_rows,
+    pending_approval_counts, user_club_rows,
+)
 
-router = APIRouter(prefix="/users", tags=["User Management"])
+router = APIRouter(prefix="/users", tags=["User Management"], route_class=ModelRoute)
 
 # Get borrowing history for a user
 @router.get("/history", response_model=schemas.BorrowHistoryResponse)
 def get_borrow_history(
+    fields: tuple[str, ...] | None = Depends(sparse_fields(HISTORY_FIELDS)),
     user: models.User = Depends(require_global_role(role=models.GlobalRoles.USER.value)),
     db: Session = Depends(get_db)
 ):
     user_id = user.id
-    logging.info(f"Fetching borrowing history for user_id={user_id}")
-
-    history_records = (
-        db.query(models.ItemBorrowingTransaction)
-        .join(models.ItemBorrowingRequest)
-        .join(models.Item)
-        .filter(models.ItemBorrowingRequest.borrower_id == user_id)
-        .order_by(models.ItemBorrowingTransaction.id.desc())
-        .all()
-    )
+    logging.info("Fetching borrowing history for user_id=%s", user_id)
+
+    history_records = borrow_history_rows(db, user_id, fields)
 
     if not history_records:
         return schemas.BorrowHistoryResponse(
@@ -35,24 +34,10 @@ def get_borrow_history(
             data=[]
         )
 
-    results = [
-        schemas.BorrowHistoryItem(
-            transaction_id=record.id,
-            item_id=record.item_borrowing_request.item.id,
-            item_club_id=record.item_borrowing_request.item.club.id if record.item_borrowing_request.item.club else None,
-            item_qr_code=record.item_borrowing_request.item.qr_code,
-            item_name=record.item_borrowing_request.item.name,
-            status=record.status.value if hasattr(record.status, "value") else record.status,
-            borrow_date=getattr(record.item_borrowing_request, "created_at", None),
-            return_date=getattr(record.item_borrowing_request, "return_date", None),
-        )
-        for record in history_records
-    ]
-
-    return schemas.BorrowHistoryResponse(
-        message="Successfully retrieved borrowing history.",
-        data=results
-    )
+    return sparse_response(schemas.BorrowHistoryResponse, fields, {
+        "message": "Successfully retrieved borrowing history.",
+        "data": history_records,
+    })
 
 # Get club admins for each club
 @router.get(
@@ -66,7 +51,7 @@ def get_club_admins(
     club: models.Club = Depends(is_club_exist),
     db: Session = Depends(get_db)
 ):
-    logging.info(f"Fetching club admins for club_id={club_id}, requested by user_id={user.id}")
+    logging.info("Fetching club admins for club_id=%s, requested by user_id=%s", club_id, user.id)
 
     membership = (
         db.query(models.Membership)
@@ -80,35 +65,15 @@ def get_club_admins(
     if not membership:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
-    admin_memberships = (
-        db.query(models.Membership)
-        .join(models.User)
-        .filter(
-            models.Membership.club_id == club_id,
-            models.Membership.role == models.ClubRoles.ADMIN.value
-        )
-        .all()
-    )
+    admins = club_role_rows(db, club_id, models.ClubRoles.ADMIN.value)
 
-    if not admin_memberships:
+    if not admins:
         return schemas.ClubAdminResponse(
             message="No admin found for this club.",
             data=[]
         )
 
-    admins = [
-        schemas.ClubAdminItem(
-            user_id=membership.user.id,
-            name=membership.user.name,
-            email=membership.user.email
-        )
-        for membership in admin_memberships
-    ]
-
-    return schemas.ClubAdminResponse(
-        message="Successfully retrieved club admins.",
-        data=admins
-    )
+    return {"message": "Successfully retrieved club admins.", "data": admins}
 
 # Get club moderators for each club
 @router.get(
@@ -122,7 +87,7 @@ def get_club_moderator(
     club: models.Club = Depends(is_club_exist),
     db: Session = Depends(get_db)
 ):
-    logging.info(f"Fetching club moderator for club_id={club_id}, requested by user_id={user.id}")
+    logging.info("Fetching club moderator for club_id=%s, requested by user_id=%s", club_id, user.id)
 
     membership = (
         db.query(models.Membership)
@@ -136,35 +101,15 @@ def get_club_moderator(
     if not membership:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
 
-    admin_memberships = (
-        db.query(models.Membership)
-        .join(models.User)
-        .filter(
-            models.Membership.club_id == club_id,
-            models.Membership.role == models.ClubRoles.MODERATOR.value
-        )
-        .all()
-    )
+    admins = club_role_rows(db, club_id, models.ClubRoles.MODERATOR.value)
 
-    if not admin_memberships:
+    if not admins:
         return schemas.ClubAdminResponse(
             message="No Moderator found for this club.",
             data=[]
         )
 
-    admins = [
-        schemas.ClubAdminItem(
-            user_id=membership.user.id,
-            name=membership.user.name,
-            email=membership.user.email
-        )
-        for membership in admin_memberships
-    ]
-
-    return schemas.ClubAdminResponse(
-        message="Successfully retrieved club moderators.",
-        data=admins
-    )
+    return {"message": "Successfully retrieved club moderators.", "data": admins}
 
 @router.get(
     "/clubs",
@@ -172,41 +117,22 @@ def get_club_moderator(
     status_code=status.HTTP_200_OK
 )
 def get_user_clubs(
+    fields: tuple[str, ...] | None = Depends(sparse_fields(CLUB_FIELDS)),
     user: models.User = Depends(require_global_role(role=models.GlobalRoles.USER.value)),
     db: Session = Depends(get_db)
 ):
 
-    logging.info(f"Fetching clubs for user_id={user.id} (global_role={user.global_role})")
-
-    if user.global_role == models.GlobalRoles.SUPERUSER.value:
-        clubs = db.query(models.Club).order_by(models.Club.id.asc()).all()
-    else:
+    logging.info("Fetching clubs for user_id=%s (global_role=%s)", user.id, user.global_role)
 
-        clubs = (
-            db.query(models.Club)
-            .join(models.Membership)
-            .filter(models.Membership.user_id == user.id)
-            .order_by(models.Club.id.asc())
-            .all()
-        )
+    clubs = user_club_rows(db, user, fields)
 
     if not clubs:
         return schemas.UserClubResponse(
             message="No clubs found.",
             data=[]
         )
-    
-    return schemas.UserClubResponse(
-        message="Successfully retrieved clubs.",
-        data=[
-            schemas.UserClubItem(
-                club_id=club.id,
-                club_name=club.name,
-                image_path=club.image_path
-            )
-            for club in clubs
-        ]
-    )
+
+    return sparse_response(schemas.UserClubResponse, fields, {"message": "Successfully retrieved clubs.", "data": clubs})
 
 @router.get(
     "/profile",
@@ -214,7 +140,8 @@ def get_user_clubs(
     status_code=status.HTTP_200_OK
 )
 def get_user_basic_info(
-    user: models.User = Depends(require_global_role(role=models.GlobalRoles.USER.value)),
+    # the profile needs the user's row, not just the token
+    user: models.User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
 
@@ -227,6 +154,48 @@ def get_user_basic_info(
     # )
     return schemas.UserProfile.model_validate(user) 
 
+# Everything the client needs on start-up in one call: profile, clubs with the user's role and
+# member counts, open loans and pending approvals of the clubs they moderate
+@router.get(
+    "/me/bootstrap",
+    response_model=schemas.BootstrapResponse,
+    status_code=status.HTTP_200_OK
+)
+def get_bootstrap(
+    # the profile needs the user's row, not just the token
+    user: models.User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    logging.info("Fetching bootstrap data for user_id=%s", user.id)
+
+    clubs = bootstrap_club_rows(db, user)
+    is_superuser = user.global_role == models.GlobalRoles.SUPERUSER.value
+    moderated = {
+        club["club_id"] for club in clubs
+        if is_superuser or (club["role"] is not None and club["role"] >= models.ClubRoles.MODERATOR.value)
+    }
+    pending = pending_approval_counts(db, moderated)
+
+    return {
+        "profile": {
+            "id": user.id,
+            "email": user.email,
+            "name": user.name,
+            "picture": user.picture,
+            "global_role": user.global_role,
+            "created_at": user.created_at,
+            "memberships": [
+                {"user_id": user.id, "club_id": club["club_id"], "role": club["role"], "joined_at": club["joined_at"]}
+                for club in clubs if club["role"] is not None
+            ],
+        },
+        "clubs": [
+            {**club, "pending_approvals": pending.get(club["club_id"], 0) if club["club_id"] in moderated else None}
+            for club in clubs
+        ],
+        "active_borrows": active_loan_rows(db, user.id),
+    }
+
 @router.get("/search/", response_model=schemas.UserOut)
 def get_a_user(
     q: str = Query(..., min_length=1, description="Search user by exact name or student ID"),
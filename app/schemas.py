@@ -1,7 +1,7 @@
 # this will be holding pydantic models for request and response bodies
 
-from typing import Optional, List
-from pydantic import BaseModel, EmailStr, Field, field_serializer, field_validator
+from typing import Literal, Optional, List
+from pydantic import AwareDatetime, BaseModel, EmailStr, Field, field_serializer, field_validator
 from datetime import datetime
 from .models import ClubRoles, ItemStatus, BorrowStatus
 
@@ -91,6 +91,11 @@ class ItemOut(Item):
         "from_attributes": True
     }
 
+    @field_validator("images", mode="before")
+    def image_urls(cls, v):
+        # lets model_validate() take an Item straight from the ORM
+        return [getattr(image, "image_url", image) for image in v]
+
 class ItemTransferIn(BaseModel):
     club_id : Optional[int] = None
 
@@ -133,6 +138,33 @@ class BorrowByQRIn(BaseModel):
 class ReturnByQRIn(BaseModel):
     qr_code: str
 
+class ScanEventIn(BaseModel):
+    event_id: str = Field(..., min_length=1, max_length=128)
+    action: Literal["borrow", "return"]
+    qr_code: str
+    occurred_at: AwareDatetime
+    return_date: Optional[AwareDatetime] = None
+
+class ScanBatchIn(BaseModel):
+    device_id: str = Field(..., min_length=1, max_length=64)
+    events: List[ScanEventIn] = Field(..., min_length=1, max_length=500)
+
+class ScanEventOutcome(BaseModel):
+    event_id: str
+    action: str
+    outcome: Literal["applied", "rejected"]
+    status_code: int
+    message: str
+    item_name: Optional[str] = None
+    replayed: bool = False
+
+class ScanBatchResponse(BaseModel):
+    message: str
+    device_id: str
+    applied: int
+    rejected: int
+    data: List[ScanEventOutcome]
+
 class ItemBorrowingTransactionOut(BaseModel):
     message: str
     item_name: str
@@ -168,10 +200,30 @@ class BorrowHistoryItem(BaseModel):
     borrow_date: Optional[datetime] = None
     return_date: Optional[datetime] = None
 
+    @field_validator("status", mode="before")
+    def status_value(cls, v):
+        return v.value if isinstance(v, BorrowStatus) else v
+
 class BorrowHistoryResponse(BaseModel):
     message: str
     data: List[BorrowHistoryItem]
 
+class OverdueLoanItem(BaseModel):
+    request_id: int
+    item_id: int
+    item_name: str
+    item_qr_code: str
+    borrower_id: int
+    borrower_name: str
+    borrower_email: str
+    borrow_date: datetime
+    return_date: datetime
+    detected_at: datetime
+
+class OverdueLoanResponse(BaseModel):
+    message: str
+    data: List[OverdueLoanItem]
+
 class ClubAdminItem(BaseModel):
     user_id: int
     name: str
@@ -261,4 +313,55 @@ class UserProfile(UserOut):
     memberships: List[MembershipOut] = []
     created_at : datetime
 
-    model_config = {"from_attributes" : True}
\ No newline at end of file
+    model_config = {"from_attributes" : True}
+
+class BootstrapClub(BaseModel):
+    club_id: int
+    club_name: str
+    image_path: Optional[str] = None
+    role: Optional[ClubRoles] = None  # None for a superuser who is not a member
+    total_members: int
+    pending_approvals: Optional[int] = None  # only for clubs the user moderates
+
+    @field_serializer("role")
+    def serialize_role(self, role: Optional[ClubRoles], _info):
+        return role.name if role is not None else None
+
+class BootstrapLoan(BaseModel):
+    request_id: int
+    item_id: int
+    item_name: str
+    club_id: Optional[int] = None
+    borrow_date: datetime
+    return_date: datetime
+
+class BootstrapResponse(BaseModel):
+    profile: UserProfile
+    clubs: List[BootstrapClub]
+    active_borrows: List[BootstrapLoan]
+
+class ProfilingToggleIn(BaseModel):
+    sample_rate: float = Field(..., ge=0, le=1, description="Fraction of requests to profile, 0 switches it off")
+    path_prefix: Optional[str] = Field(None, description="Only profile paths starting with this")
+    minutes: int = Field(15, ge=1, le=1440, description="Sampling switches itself off after this")
+
+class ProfilingToggleOut(BaseModel):
+    sample_rate: float
+    path_prefix: Optional[str] = None
+    expires_at: Optional[datetime] = None
+
+class TokenPair(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int  # seconds until the access token expires
+
+class RefreshTokenIn(BaseModel):
+    refresh_token: str
+
+class LoginCodeIn(BaseModel):
+    code: str
+
+class LogoutIn(BaseModel):
+    refresh_token: str
+    everywhere: bool = Field(False, description="Also revoke every other token of the user")
@@ -0,0 +1,139 @@
+import logging
+import math
+import os
+import tempfile
+import psycopg
+import uvicorn
+from .config import settings
+from .logger import setup_logging
+
+# Production launcher: python -m app.server
+# Sizes the uvicorn workers from the CPUs this container may use, splits the Postgres
+# connection budget between them (pool_size + max_overflow + the club events LISTEN
+# connection per worker, across DB_APP_INSTANCES containers), drains in-flight requests on
+# SIGTERM for GRACEFUL_SHUTDOWN_SECONDS and recycles each worker after MAX_REQUESTS_PER_WORKER.
+# With several workers the metrics are added up through a shared directory (utils/metrics.py).
+# Must not import app.database: the pool settings are decided here before any engine exists.
+
+# connections a worker holds outside its pool (the club events listener)
+EXTRA_CONNECTIONS_PER_WORKER = 1
+MIN_POOL_SIZE = 2
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> float:
+    """CPUs this process may use: affinity mask, capped by a cgroup CPU quota if there is one."""
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        cpus = float(os.cpu_count() or 1)
+
+    # cgroup v2, then v1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, int(quota) / int(period))
+    except (OSError, ValueError):
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+                quota = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                period = int(f.read())
+            if quota > 0:
+                cpus = min(cpus, quota / period)
+        except (OSError, ValueError):
+            pass
+    return cpus
+
+
+def worker_count() -> int:
+    if settings.WEB_CONCURRENCY:
+        return settings.WEB_CONCURRENCY
+    return max(1, min(settings.MAX_WORKERS, math.ceil(available_cpus() * settings.WORKERS_PER_CPU)))
+
+
+def connection_budget() -> int | None:
+    """Connections this app may open in total, or None when the database can't be asked."""
+    try:
+        with psycopg.connect(
+            host=settings.DATABASE_HOSTNAME,
+            port=settings.DATABASE_PORT,
+            dbname=settings.DATABASE_NAME,
+            user=settings.DATABASE_USERNAME,
+            password=settings.DATABASE_PASSWORD,
+            connect_timeout=5,
+        ) as conn:
+            max_connections = int(conn.execute("SHOW max_connections").fetchone()[0])
+            superuser_reserved = int(conn.execute("SHOW superuser_reserved_connections").fetchone()[0])
+    except psycopg.Error as e:
+        logger.warning("Could not read max_connections (%s), keeping the configured pool sizes", e)
+        return None
+    return max_connections - superuser_reserved - settings.DB_RESERVED_CONNECTIONS
+
+
+def plan_pools(workers: int, budget: int | None) -> tuple[int, int, int]:
+    """Returns (workers, pool_size, max_overflow) so that every worker's peak fits the budget."""
+    if budget is None:
+        return workers, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+
+    per_instance = budget // max(1, settings.DB_APP_INSTANCES)
+    # fewer workers rather than workers that can't get a connection
+    max_workers = per_instance // (MIN_POOL_SIZE + EXTRA_CONNECTIONS_PER_WORKER)
+    if max_workers < workers:
+        logger.warning("Only %s connections per instance, reducing workers from %s to %s", per_instance, workers, max(1, max_workers))
+        workers = max(1, max_workers)
+
+    per_worker = per_instance // workers - EXTRA_CONNECTIONS_PER_WORKER
+    pool_size = max(1, min(settings.DB_POOL_SIZE, per_worker))
+    max_overflow = max(0, min(settings.DB_MAX_OVERFLOW, per_worker - pool_size))
+    return workers, pool_size, max_overflow
+
+
+def metrics_directory(workers: int) -> str | None:
+    """A fresh directory the workers share their metrics through, None when there is one worker."""
+    if workers <= 1 or not settings.METRICS_ENABLED:
+        return None
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return tempfile.mkdtemp(prefix="metrics-")
+    # values left by a previous server would be counted again
+    os.makedirs(directory, exist_ok=True)
+    for filename in os.listdir(directory):
+        if filename.endswith(".json"):
+            os.remove(os.path.join(directory, filename))
+    return directory
+
+
+def main():
+    setup_logging()
+    workers, pool_size, max_overflow = plan_pools(worker_count(), connection_budget())
+
+    # spawned workers build their settings from the environment, the in-process one from settings
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    settings.DB_POOL_SIZE = pool_size
+    settings.DB_MAX_OVERFLOW = max_overflow
+    directory = metrics_directory(workers)
+    if directory:
+        os.environ["METRICS_MULTIPROC_DIR"] = directory
+        settings.METRICS_MULTIPROC_DIR = directory
+
+    logger.info(
+        "Starting %s worker(s) on %s:%s, DB pool %s + %s overflow per worker, recycling after %s requests",
+        workers, settings.HOST, settings.PORT, pool_size, max_overflow, settings.MAX_REQUESTS_PER_WORKER or "no",
+    )
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        limit_max_requests=settings.MAX_REQUESTS_PER_WORKER or None,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_SECONDS,
+        log_config=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import psycopg
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from ..config import settings
+
+# Club change events (item status, new/updated borrowing transactions).
+# Writers NOTIFY inside their own transaction, so an event only goes out once the change is
+# committed (and never for a rollback). Each worker keeps one LISTEN connection and fans every
+# notification out to the moderator streams of that club connected to it.
+
+CHANNEL = "club_events"
+
+# events a slow client can fall behind before new ones are dropped for it
+SUBSCRIBER_QUEUE_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+def publish_club_event(db: Session, club_id: int, event_type: str, **data):
+    """Queues a club event on the current transaction, it is delivered on commit."""
+    payload = json.dumps({"club_id": club_id, "type": event_type, **data}, default=str)
+    db.execute(select(func.pg_notify(CHANNEL, payload)))
+
+
+class ClubEventBroadcaster:
+    def __init__(self):
+        self._subscribers: dict[int, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+        self._listener: threading.Thread | None = None
+
+    def subscribe(self, club_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(club_id, set()).add((asyncio.get_running_loop(), queue))
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="club-events-listener", daemon=True)
+                self._listener.start()
+        return queue
+
+    def unsubscribe(self, club_id: int, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(club_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(club_id, None)
+
+    def dispatch(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event.get("club_id"), ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, event)
+
+    @staticmethod
+    def _offer(queue: asyncio.Queue, event: dict):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("Dropping club event for a slow subscriber: %s", event.get("type"))
+
+    def _listen(self):
+        while True:
+            try:
+                with psycopg.connect(
+                    host=settings.DATABASE_HOSTNAME,
+                    port=settings.DATABASE_PORT,
+                    dbname=settings.DATABASE_NAME,
+                    user=settings.DATABASE_USERNAME,
+                    password=settings.DATABASE_PASSWORD,
+                    autocommit=True,
+                ) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    logger.info("Listening for club events on channel %s", CHANNEL)
+                    for notify in conn.notifies():
+                        try:
+                            self.dispatch(json.loads(notify.payload))
+                        except ValueError:
+                            logger.warning("Ignoring malformed club event payload")
+            except psycopg.Error:
+                logger.exception("Club event listener lost its connection, reconnecting")
+                time.sleep(5)
+
+
+broadcaster = ClubEventBroadcaster()
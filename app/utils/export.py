@@ -0,0 +1,39 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Iterable, Iterator, Sequence
+
+
+def _plain(value):
+    """Converts a column value into something json/csv can write."""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_ndjson(batches: Iterable[Sequence], columns: list[str]) -> Iterator[str]:
+    """Yields one newline-delimited JSON chunk per batch of rows."""
+    for rows in batches:
+        yield "".join(
+            json.dumps({col: _plain(val) for col, val in zip(columns, row)}) + "\n"
+            for row in rows
+        )
+
+
+def stream_csv(batches: Iterable[Sequence], columns: list[str]) -> Iterator[str]:
+    """Yields the CSV header followed by one CSV chunk per batch of rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    for rows in batches:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows([_plain(val) for val in row] for row in rows)
+        yield buffer.getvalue()
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models import IdempotencyKey
+
+# expired keys removed per write, keeps the cleanup cheap on the hot path
+PURGE_BATCH_SIZE = 100
+
+
+def find_idempotency_record(db: Session, *, key: str | None, user_id: int, endpoint: str) -> IdempotencyKey | None:
+    """Returns the unexpired stored outcome for an Idempotency-Key, if any."""
+    if not key:
+        return None
+
+    record = db.execute(
+        select(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > datetime.now(timezone.utc),
+        )
+    ).scalars().first()
+
+    if record and record.endpoint != endpoint:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    return record
+
+
+def find_idempotent_response(db: Session, *, key: str | None, user_id: int, endpoint: str) -> ORJSONResponse | None:
+    """Returns the stored response of an earlier request with the same Idempotency-Key, if any."""
+    record = find_idempotency_record(db, key=key, user_id=user_id, endpoint=endpoint)
+    if not record:
+        return None
+
+    return ORJSONResponse(
+        status_code=record.status_code,
+        content=record.response_body,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def save_idempotent_response(
+    db: Session,
+    *,
+    key: str | None,
+    user_id: int,
+    endpoint: str,
+    status_code: int,
+    body: dict,
+):
+    """Stores the response in the current transaction, so it is committed together with the write."""
+    if not key:
+        return
+
+    now = datetime.now(timezone.utc)
+
+    expired = (
+        select(IdempotencyKey.id)
+        .where(IdempotencyKey.expires_at <= now)
+        .limit(PURGE_BATCH_SIZE)
+        .scalar_subquery()
+    )
+    db.execute(delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired)))
+    # an expired row for the same key would otherwise collide on the unique constraint
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at <= now,
+        )
+    )
+
+    db.add(IdempotencyKey(
+        key=key,
+        user_id=user_id,
+        endpoint=endpoint,
+        status_code=status_code,
+        response_body=body,
+        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+    ))
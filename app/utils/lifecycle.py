@@ -0,0 +1,29 @@
+import logging
+import signal
+import threading
+
+# Set once the worker has been asked to stop (SIGTERM/SIGINT). Uvicorn then stops accepting
+# connections and waits up to GRACEFUL_SHUTDOWN_SECONDS for in-flight requests; long-lived
+# streams check this flag to end early instead of holding the drain open until the timeout.
+draining = threading.Event()
+
+logger = logging.getLogger(__name__)
+
+
+def install_drain_handlers():
+    """Chains a handler in front of the server's SIGTERM/SIGINT handlers that sets `draining`."""
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(signum)
+
+        def handler(received, frame, previous=previous):
+            if not draining.is_set():
+                logger.info("Received %s, draining in-flight requests", signal.Signals(received).name)
+            draining.set()
+            if callable(previous):
+                previous(received, frame)
+
+        try:
+            signal.signal(signum, handler)
+        except ValueError:
+            # not the main thread (e.g. TestClient), nothing to drain
+            return
@@ -2,8 +2,11 @@ from sqlalchemy import Enum
 from ..models import Logging
 from sqlalchemy.orm import Session
 from datetime import datetime
+from .metrics import audit_log_writes
+from .tracing import traced
 
 
+@traced("audit.log_operation")
 def log_operation(
     db: Session,
     *,
@@ -12,8 +15,12 @@ def log_operation(
     who_id: int,
     new_val: dict | None = None,
     old_val: dict | None = None,
+    commit: bool = True,
 ):
-    """Logs all CRUD operation to the logging table."""
+    """Logs all CRUD operation to the logging table.
+
+    Pass commit=False to keep the log entry in the caller's transaction.
+    """
 
     old_val=safe_log(old_val) if old_val else None
     new_val=safe_log(new_val) if new_val else None
@@ -33,7 +40,9 @@ def log_operation(
         new_val=new_val,
     )
     db.add(log_entry)
-    db.commit()
+    audit_log_writes.inc(tablename, log_entry.operation)
+    if commit:
+        db.commit()
 
 import json
 from datetime import datetime
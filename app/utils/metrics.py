@@ -0,0 +1,305 @@
+import bisect
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Iterable
+
+# Minimal Prometheus text-format metrics, no client library or external service needed.
+# Updates take one lock and a dict lookup so they are cheap enough to leave on at full load;
+# gauges that are only meaningful at scrape time (pool stats, queue depths) are callbacks.
+#
+# With several workers (app/server.py) every process has its own registry and a scrape lands
+# on any one of them, so each worker also writes its values to METRICS_MULTIPROC_DIR every
+# METRICS_FLUSH_SECONDS and /metrics sums the files of all workers. Counters and histograms of
+# workers that have exited (recycled, crashed) are folded into one file and keep counting, so
+# totals never go backwards; gauges only count live workers.
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, description, labels=()):
+        super().__init__(name, description, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> dict[tuple, float]:
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def combine(a: float, b: float) -> float:
+        return a + b
+
+    def render(self, values: dict[tuple, float] | None = None) -> list[str]:
+        values = self.collect() if values is None else values
+        return self.header() + [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, description, labels=(), callback: Callable[[], dict[tuple, float]] | None = None):
+        super().__init__(name, description, labels)
+        self._values: dict[tuple, float] = {}
+        self._callback = callback
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+    def collect(self) -> dict[tuple, float]:
+        if self._callback is not None:
+            return dict(self._callback())
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def combine(a: float, b: float) -> float:
+        return a + b
+
+    def render(self, values: dict[tuple, float] | None = None) -> list[str]:
+        values = self.collect() if values is None else values
+        return self.header() + [f"{self.name}{_labels(self.label_names, key)} {_number(value)}" for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, description, labels=(), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, *labels, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def collect(self) -> dict[tuple, tuple[list[int], float]]:
+        with self._lock:
+            return {key: (list(counts), total[0]) for key, (counts, total) in self._values.items()}
+
+    @staticmethod
+    def combine(a: tuple[list[int], float], b: tuple[list[int], float]) -> tuple[list[int], float]:
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1]
+
+    def render(self, values: dict[tuple, tuple[list[int], float]] | None = None) -> list[str]:
+        values = self.collect() if values is None else values
+        lines = self.header()
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                bucket = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, bucket)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.store: "MultiprocessStore | None" = None
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            # modules can be re-imported (reload, tests), keep the first instance
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, description, labels=()) -> Counter:
+        return self.register(Counter(name, description, labels))
+
+    def gauge(self, name, description, labels=(), callback=None) -> Gauge:
+        return self.register(Gauge(name, description, labels, callback))
+
+    def histogram(self, name, description, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, description, labels, buckets))
+
+    def metrics(self) -> list[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render(self) -> str:
+        """This process's values, or all workers' when a multiprocess directory is set."""
+        if self.store is None:
+            lines = [line for metric in self.metrics() for line in metric.render()]
+        else:
+            merged = self.store.collect(self)
+            lines = [line for metric in self.metrics() for line in metric.render(merged.get(metric.name, {}))]
+        return "\n".join(lines) + "\n"
+
+
+class MultiprocessStore:
+    """One JSON file of values per worker in a directory shared by the workers of one server."""
+
+    RETIRED = "retired.json"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        # the pid alone could be reused by a later worker and overwrite a retired one's file
+        self.filename = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+
+    def flush(self, registry: Registry):
+        self._write(self.filename, {
+            metric.name: [[list(key), value] for key, value in metric.collect().items()]
+            for metric in registry.metrics()
+        })
+
+    def collect(self, registry: Registry) -> dict[str, dict[tuple, object]]:
+        """Every worker's values summed per metric and label set, after flushing this one."""
+        self.flush(registry)
+        metrics = {metric.name: metric for metric in registry.metrics()}
+
+        def add(target: dict, data: dict, with_gauges: bool):
+            for name, values in data.items():
+                metric = metrics.get(name)
+                if metric is None or (metric.kind == "gauge" and not with_gauges):
+                    continue
+                series = target.setdefault(name, {})
+                for key, value in values:
+                    key = tuple(key)
+                    series[key] = metric.combine(series[key], value) if key in series else value
+
+        merged: dict[str, dict[tuple, object]] = {}
+        retired: dict[str, dict[tuple, object]] = {}
+        # one reader at a time, so an exited worker's file is folded in exactly once
+        with open(os.path.join(self.directory, ".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            add(retired, self._read(self.RETIRED), with_gauges=False)
+            exited = []
+            for filename in os.listdir(self.directory):
+                if not filename.endswith(".json") or filename == self.RETIRED:
+                    continue
+                if _alive(int(filename.split("-", 1)[0])):
+                    add(merged, self._read(filename), with_gauges=True)
+                else:
+                    add(retired, self._read(filename), with_gauges=False)
+                    exited.append(filename)
+
+            if exited:
+                self._write(self.RETIRED, {
+                    name: [[list(key), value] for key, value in values.items()] for name, values in retired.items()
+                })
+                for filename in exited:
+                    os.remove(os.path.join(self.directory, filename))
+
+        for name, values in retired.items():
+            add(merged, {name: [[key, value] for key, value in values.items()]}, with_gauges=False)
+        return merged
+
+    def _write(self, filename: str, data: dict):
+        path = os.path.join(self.directory, filename)
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        # readers never see a half-written file
+        os.replace(path + ".tmp", path)
+
+    def _read(self, filename: str) -> dict:
+        try:
+            with open(os.path.join(self.directory, filename)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+registry = Registry()
+
+
+def run_metrics_flush(interval: float):
+    while True:
+        time.sleep(interval)
+        try:
+            registry.store.flush(registry)
+        except OSError:
+            logger.exception("Writing metrics for the other workers failed")
+
+
+def start_metrics_flush(directory: str | None, interval: float):
+    """Shares this worker's metrics through `directory` (set by app/server.py with several workers)."""
+    if not directory:
+        return None
+    registry.store = MultiprocessStore(directory)
+    thread = threading.Thread(target=run_metrics_flush, args=(interval,), name="metrics-flush", daemon=True)
+    thread.start()
+    return thread
+
+
+def flush_metrics():
+    """Writes this worker's final values on shutdown, so they outlive it in the shared totals."""
+    if registry.store is not None:
+        registry.store.flush(registry)
+
+
+# metrics recorded outside the HTTP middleware
+storage_upload_seconds = registry.histogram(
+    "storage_upload_duration_seconds", "Time spent uploading a file to object storage", ("outcome",)
+)
+audit_log_writes = registry.counter(
+    "audit_log_writes_total", "Audit log entries written by log_operation", ("tablename", "operation")
+)
@@ -0,0 +1,204 @@
+from typing import Iterable, Sequence
+from sqlalchemy import String, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.orm import Session, aliased
+from .. import models
+
+# Read-side queries for the list endpoints. They select only the columns a response needs with
+# Core select() and hand back RowMapping rows (named, slotted, no identity map or instance
+# state), which the response models validate directly. Item images are folded into each item row
+# with array_agg instead of a selectinload round trip.
+# Each *_FIELDS map is the endpoint's `fields=` allow-list: response field name -> column. A
+# query selects the requested subset (all of them by default), labelled with the field names.
+
+# correlated, so it only runs for the rows left after OFFSET/LIMIT, and only when requested
+_item_images = (
+    select(array_agg(aggregate_order_by(models.ItemImage.image_url, models.ItemImage.id.asc())))
+    .where(models.ItemImage.item_id == models.Item.id)
+    .scalar_subquery()
+)
+
+# the latest transaction of the request in the enclosing query; APPROVED means the item has
+# been handed over (a request waiting for approval is not a loan yet)
+latest_transaction_status = (
+    select(models.ItemBorrowingTransaction.status)
+    .where(models.ItemBorrowingTransaction.item_borrowing_request_id == models.ItemBorrowingRequest.id)
+    .order_by(models.ItemBorrowingTransaction.id.desc())
+    .limit(1)
+    .correlate(models.ItemBorrowingRequest)
+    .scalar_subquery()
+)
+
+ITEM_FIELDS = {
+    "id": models.Item.id,
+    "name": models.Item.name,
+    "description": models.Item.description,
+    # the enum's text, not a Python ItemStatus per row
+    "status": models.Item.status.cast(String),
+    "is_high_risk": models.Item.is_high_risk,
+    "images": func.coalesce(_item_images, literal_column("'{}'")),
+}
+
+MEMBER_FIELDS = {
+    "user_id": models.User.id,
+    "name": models.User.name,
+    "email": models.User.email,
+}
+
+CLUB_FIELDS = {
+    "club_id": models.Club.id,
+    "club_name": models.Club.name,
+    "image_path": models.Club.image_path,
+}
+
+HISTORY_FIELDS = {
+    "transaction_id": models.ItemBorrowingTransaction.id,
+    "item_name": models.Item.name,
+    "item_id": models.Item.id,
+    "item_club_id": models.Item.club_id,
+    "item_qr_code": models.Item.qr_code,
+    "status": models.ItemBorrowingTransaction.status,
+    "borrow_date": models.ItemBorrowingRequest.created_at,
+    "return_date": models.ItemBorrowingRequest.return_date,
+}
+
+
+def _columns(available: dict, fields: Sequence[str] | None) -> list:
+    return [available[name].label(name) for name in (fields or available)]
+
+
+def club_item_rows(
+    db: Session, club_id: int, *, query: str | None, skip: int, limit: int, fields: Sequence[str] | None = None
+) -> Sequence[RowMapping]:
+    """A page of a club's items (ItemSearchOut fields), image URLs in upload order."""
+    stmt = select(*_columns(ITEM_FIELDS, fields)).where(models.Item.club_id == club_id)
+
+    if query:
+        stmt = stmt.where(
+            or_(
+                models.Item.name.ilike(f"%{query}%"),
+                models.Item.description.ilike(f"%{query}%"),
+            )
+        )
+
+    return db.execute(stmt.order_by(models.Item.id.asc()).offset(skip).limit(limit)).mappings().all()
+
+
+def club_member_rows(db: Session, club_id: int, fields: Sequence[str] | None = None) -> Sequence[RowMapping]:
+    """Members of a club (ClubMembersOut fields)."""
+    return db.execute(
+        select(*_columns(MEMBER_FIELDS, fields))
+        .select_from(models.User)
+        .join(models.Membership, models.User.id == models.Membership.user_id)
+        .where(models.Membership.club_id == club_id)
+    ).mappings().all()
+
+
+def club_role_rows(db: Session, club_id: int, role: int) -> Sequence[RowMapping]:
+    """Members of a club holding exactly `role` (ClubAdminItem fields)."""
+    return db.execute(
+        select(*_columns(MEMBER_FIELDS, None))
+        .join(models.Membership, models.User.id == models.Membership.user_id)
+        .where(models.Membership.club_id == club_id, models.Membership.role == role)
+    ).mappings().all()
+
+
+def user_club_rows(db: Session, user: models.User, fields: Sequence[str] | None = None) -> Sequence[RowMapping]:
+    """Clubs the user belongs to, every club for a superuser (UserClubItem fields)."""
+    stmt = select(*_columns(CLUB_FIELDS, fields)).select_from(models.Club)
+    if user.global_role != models.GlobalRoles.SUPERUSER.value:
+        stmt = stmt.join(models.Membership).where(models.Membership.user_id == user.id)
+    return db.execute(stmt.order_by(models.Club.id.asc())).mappings().all()
+
+
+def borrow_history_rows(db: Session, user_id: int, fields: Sequence[str] | None = None) -> Sequence[RowMapping]:
+    """The user's borrowing transactions, newest first (BorrowHistoryItem fields)."""
+    columns = _columns(HISTORY_FIELDS, fields)
+    stmt = (
+        select(*columns)
+        .select_from(models.ItemBorrowingTransaction)
+        .join(models.ItemBorrowingRequest, models.ItemBorrowingTransaction.item_borrowing_request_id == models.ItemBorrowingRequest.id)
+        .where(models.ItemBorrowingRequest.borrower_id == user_id)
+    )
+    # every request has an item, the join is only needed for item columns
+    if any(getattr(column.element, "table", None) is models.Item.__table__ for column in columns):
+        stmt = stmt.join(models.Item, models.ItemBorrowingRequest.item_id == models.Item.id)
+    return db.execute(stmt.order_by(models.ItemBorrowingTransaction.id.desc())).mappings().all()
+
+
+def bootstrap_club_rows(db: Session, user: models.User) -> Sequence[RowMapping]:
+    """The user's clubs (every club for a superuser) with their membership and member count."""
+    counted = aliased(models.Membership)
+    member_count = (
+        select(func.count())
+        .select_from(counted)
+        .where(counted.club_id == models.Club.id)
+        .correlate(models.Club)
+        .scalar_subquery()
+    )
+    stmt = select(
+        models.Club.id.label("club_id"),
+        models.Club.name.label("club_name"),
+        models.Club.image_path,
+        models.Membership.role,
+        models.Membership.joined_at,
+        member_count.label("total_members"),
+    )
+    if user.global_role == models.GlobalRoles.SUPERUSER.value:
+        stmt = stmt.select_from(models.Club).outerjoin(
+            models.Membership, (models.Membership.club_id == models.Club.id) & (models.Membership.user_id == user.id)
+        )
+    else:
+        stmt = stmt.join(models.Membership, models.Membership.club_id == models.Club.id).where(models.Membership.user_id == user.id)
+    return db.execute(stmt.order_by(models.Club.id.asc())).mappings().all()
+
+
+def active_loan_rows(db: Session, user_id: int) -> Sequence[RowMapping]:
+    """Loans the user has not returned yet, soonest due first (BootstrapLoan fields).
+
+    Only handed-over items count: a request still waiting for approval is not a loan.
+    """
+    return db.execute(
+        select(
+            models.ItemBorrowingRequest.id.label("request_id"),
+            models.Item.id.label("item_id"),
+            models.Item.name.label("item_name"),
+            models.Item.club_id,
+            models.ItemBorrowingRequest.created_at.label("borrow_date"),
+            models.ItemBorrowingRequest.return_date,
+        )
+        .join(models.Item, models.ItemBorrowingRequest.item_id == models.Item.id)
+        .where(
+            models.ItemBorrowingRequest.borrower_id == user_id,
+            models.ItemBorrowingRequest.returned_at.is_(None),
+            latest_transaction_status == models.BorrowStatus.APPROVED,
+        )
+        .order_by(models.ItemBorrowingRequest.return_date.asc())
+    ).mappings().all()
+
+
+def pending_approval_counts(db: Session, club_ids: Iterable[int]) -> dict[int, int]:
+    """Requests per club whose latest transaction waits for approval or a condition check."""
+    club_ids = list(club_ids)
+    if not club_ids:
+        return {}
+
+    latest = (
+        select(func.max(models.ItemBorrowingTransaction.id).label("transaction_id"))
+        .join(models.ItemBorrowingRequest, models.ItemBorrowingTransaction.item_borrowing_request_id == models.ItemBorrowingRequest.id)
+        .join(models.Item, models.ItemBorrowingRequest.item_id == models.Item.id)
+        .where(models.Item.club_id.in_(club_ids))
+        .group_by(models.ItemBorrowingTransaction.item_borrowing_request_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(models.Item.club_id, func.count())
+        .select_from(models.ItemBorrowingTransaction)
+        .join(latest, models.ItemBorrowingTransaction.id == latest.c.transaction_id)
+        .join(models.ItemBorrowingRequest, models.ItemBorrowingTransaction.item_borrowing_request_id == models.ItemBorrowingRequest.id)
+        .join(models.Item, models.ItemBorrowingRequest.item_id == models.Item.id)
+        .where(models.ItemBorrowingTransaction.status.in_([models.BorrowStatus.PENDING_APPROVAL, models.BorrowStatus.PENDING_CONDITION_CHECK]))
+        .group_by(models.Item.club_id)
+    ).all()
+    return dict(rows)
@@ -0,0 +1,96 @@
+import functools
+import inspect
+from typing import Optional, get_args, get_origin
+from fastapi import Response
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter, create_model
+
+# JSON responses are rendered with orjson (ORJSONResponse is the app's default_response_class).
+# Routes that build their response model by hand (e.g. ItemSearchResponse) already validated it
+# while constructing it; FastAPI would still run it through response_model validation, dump it to
+# a dict and only then encode it. ModelRoute skips that second pass: when an endpoint returns an
+# instance of exactly its response_model (or a list of them), pydantic-core writes the JSON bytes
+# straight from the model. Anything else (ORM objects, dicts) takes the normal validate-once path.
+
+
+class ModelRoute(APIRoute):
+    def get_route_handler(self):
+        adapter = _prebuilt_adapter(self.response_model)
+        response_class = self.response_class.value if isinstance(self.response_class, DefaultPlaceholder) else self.response_class
+        if adapter is not None and issubclass(response_class, JSONResponse):
+            self.dependant.call = _render_prebuilt(
+                self.dependant.call, self.response_model, adapter, self.status_code or 200, response_class.media_type
+            )
+        return super().get_route_handler()
+
+
+def _prebuilt_adapter(response_model) -> TypeAdapter | None:
+    if inspect.isclass(response_model) and issubclass(response_model, BaseModel):
+        return TypeAdapter(response_model)
+    if get_origin(response_model) is list:
+        (item_model,) = get_args(response_model)
+        if inspect.isclass(item_model) and issubclass(item_model, BaseModel):
+            return TypeAdapter(response_model)
+    return None
+
+
+def _is_prebuilt(result, response_model) -> bool:
+    # exact class only, a subclass could carry fields the response model would drop
+    if type(result) is response_model:
+        return True
+    if isinstance(result, list) and get_origin(response_model) is list:
+        (item_model,) = get_args(response_model)
+        return all(type(item) is item_model for item in result)
+    return False
+
+
+def _render_prebuilt(call, response_model, adapter: TypeAdapter, status_code: int, media_type: str):
+    def render(result):
+        if _is_prebuilt(result, response_model):
+            return Response(content=adapter.dump_json(result, by_alias=True), status_code=status_code, media_type=media_type)
+        return result
+
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            return render(await call(*args, **kwargs))
+    else:
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            return render(call(*args, **kwargs))
+
+    return endpoint
+
+
+# Sparse fieldsets (`fields=` on list endpoints, see dependencies.sparse_fields). The list
+# response models require every field, so a sparse payload is validated against a variant of
+# the response model whose unrequested item fields are optional, and those fields are left out
+# when it is written.
+
+
+@functools.lru_cache(maxsize=256)
+def sparse_model(response_model: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    """`response_model` with only `fields` required on the items of its `data` list."""
+    (item_model,) = get_args(response_model.model_fields["data"].annotation)
+    item_subset = create_model(
+        f"{item_model.__name__}Sparse",
+        __base__=item_model,
+        **{name: (Optional[field.annotation], None) for name, field in item_model.model_fields.items() if name not in fields},
+    )
+    return create_model(f"{response_model.__name__}Sparse", __base__=response_model, data=(list[item_subset], ...))
+
+
+def sparse_response(response_model: type[BaseModel], fields: tuple[str, ...] | None, payload: dict):
+    """Returns `payload` as is without `fields`, otherwise renders it with only those item fields."""
+    if not fields:
+        return payload
+
+    model = sparse_model(response_model, fields)
+    (item_model,) = get_args(response_model.model_fields["data"].annotation)
+    omitted = {name for name in item_model.model_fields if name not in fields}
+    return Response(
+        content=model.__pydantic_serializer__.to_json(model(**payload), by_alias=True, exclude={"data": {"__all__": omitted}}),
+        media_type="application/json",
+    )
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException, status
+from sqlalchemy import select, desc
+from sqlalchemy.orm import Session
+from .. import models
+from .. import schemas
+from .events import publish_club_event
+
+# Borrow/return logic shared by the single scan routes and the kiosk batch sync.
+# None of these commit, the caller owns the transaction.
+
+
+def lock_item_by_qr(db: Session, qr_code: str) -> models.Item | None:
+    """Loads the item behind a QR code and holds a row lock on it until the transaction ends."""
+    return (
+        db.execute(
+            select(models.Item)
+            .where(models.Item.qr_code == qr_code)
+            .with_for_update()
+        ).scalars().first()
+    )
+
+
+def apply_borrow(
+    db: Session,
+    item: models.Item | None,
+    *,
+    club_id: int,
+    user_id: int,
+    return_date: datetime | None = None,
+    occurred_at: datetime | None = None,
+):
+    """Creates the borrowing request and its first transaction for a locked item."""
+    now = occurred_at or datetime.now(timezone.utc)
+
+    if not item:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item with this QR code not found")
+    if item.club_id != club_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item does not belong to this club")
+    if item.status != models.ItemStatus.AVAILABLE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item is not available for borrowing")
+    if return_date and return_date <= now:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Return date must be in the future")
+
+    # replayed scans keep the device time as the borrow date, transactions stay in server time
+    # since the latest transaction of a request is found by processed_at (then id)
+    borrowing_request = models.ItemBorrowingRequest(
+        item_id=item.id,
+        borrower_id=user_id,
+        return_date=return_date or (now + timedelta(days=7)),
+        **({"created_at": occurred_at} if occurred_at else {}),
+    )
+
+    tx_status = (
+        models.BorrowStatus.PENDING_APPROVAL
+        if getattr(item, "is_high_risk", False)
+        else models.BorrowStatus.APPROVED
+    )
+
+    borrow_transaction = models.ItemBorrowingTransaction(
+        item_borrowing_request=borrowing_request,
+        status=tx_status,
+        operator_id=None,
+    )
+
+    item.status = models.ItemStatus.UNAVAILABLE
+    db.add_all([borrowing_request, borrow_transaction])
+    db.flush()
+
+    publish_club_event(
+        db,
+        club_id,
+        "borrow",
+        item_id=item.id,
+        item_status=item.status.value,
+        transaction_id=borrow_transaction.id,
+        transaction_status=borrow_transaction.status.value,
+    )
+
+    message = "Pending Approval" if getattr(item, "is_high_risk", False) else "Successfully borrowed"
+    resp = schemas.BorrowItemOut.model_validate(
+        {
+            "message": message,
+            "item_name": item.name,
+        },
+        from_attributes=True,
+    )
+
+    return resp, borrowing_request
+
+
+def apply_return(
+    db: Session,
+    item: models.Item | None,
+    *,
+    club_id: int,
+    user_id: int,
+):
+    """Records the return of a locked item borrowed by the user."""
+    if not item:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item with this QR code not found")
+    if item.club_id != club_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item does not belong to this club")
+    if item.status != models.ItemStatus.UNAVAILABLE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item is not currently borrowed")
+
+    borrowing_transaction = (
+        db.execute(
+            select(models.ItemBorrowingTransaction)
+            .join(models.ItemBorrowingRequest)
+            .where(models.ItemBorrowingRequest.item_id == item.id)
+            # processed_at is the transaction start time, shared by every row a /sync batch
+            # writes; the id orders a borrow and return of the same item within one batch
+            .order_by(desc(models.ItemBorrowingTransaction.processed_at), desc(models.ItemBorrowingTransaction.id))
+        )
+    ).scalars().first()
+
+    if not borrowing_transaction or borrowing_transaction.status != models.BorrowStatus.APPROVED:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Item borrowing not approved yet")
+
+    if borrowing_transaction.item_borrowing_request.borrower_id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You do not have permission to return this item")
+
+    return_status = (models.BorrowStatus.PENDING_CONDITION_CHECK if item.is_high_risk
+                     else models.BorrowStatus.COMPLETED)
+
+    return_transaction = models.ItemBorrowingTransaction(
+        item_borrowing_request_id=borrowing_transaction.item_borrowing_request_id,
+        operator_id=None,
+        status=return_status,
+        remarks="Item returned, pending condition check" if item.is_high_risk else "Item returned by user",
+    )
+
+    if not item.is_high_risk:
+        item.status = models.ItemStatus.AVAILABLE
+
+    # closes the loan for the overdue sweep
+    borrowing_transaction.item_borrowing_request.returned_at = datetime.now(timezone.utc)
+
+    db.add(return_transaction)
+    db.flush()
+
+    publish_club_event(
+        db,
+        club_id,
+        "return",
+        item_id=item.id,
+        item_status=item.status.value,
+        transaction_id=return_transaction.id,
+        transaction_status=return_transaction.status.value,
+    )
+
+    message = "Item returned, pending condition check" if item.is_high_risk else "Item successfully returned"
+    resp = schemas.BorrowItemOut.model_validate(
+        {"message": message, "item_name": item.name},
+        from_attributes=True,
+    )
+
+    return resp, return_transaction
@@ -7,6 +7,9 @@ from app.config import settings
 from urllib.parse import urlparse
 from sqlalchemy.orm import Session
 import os
+import time
+from .metrics import storage_upload_seconds
+from .tracing import SPAN_KIND_CLIENT, span
 
 def create_unique_filename(filename: str) -> str:
     """
@@ -29,24 +32,32 @@ def upload_file_to_s3(file: UploadFile, file_name: str) -> str:
 
     region = settings.AWS_REGION
     base_url = f"https://{settings.AWS_S3_BUCKET}.s3.{region}.amazonaws.com"
+    if settings.AWS_S3_ENDPOINT_URL:
+        # S3 compatible servers use path-style URLs
+        base_url = f"{settings.AWS_S3_ENDPOINT_URL.rstrip('/')}/{settings.AWS_S3_BUCKET}"
 
     s3 = boto3.client(
         "s3",
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
         # aws_session_token=settings.AWS_SESSION_TOKEN,
-        region_name=region
+        region_name=region,
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
     )
 
+    started = time.perf_counter()
     try:
-        s3.upload_fileobj(
-            file.file,
-            settings.AWS_S3_BUCKET,
-            file_name,
-            ExtraArgs={"ContentType": file.content_type}
-        )
+        with span("storage.upload", SPAN_KIND_CLIENT, **{"storage.bucket": settings.AWS_S3_BUCKET, "storage.key": file_name}):
+            s3.upload_fileobj(
+                file.file,
+                settings.AWS_S3_BUCKET,
+                file_name,
+                ExtraArgs={"ContentType": file.content_type}
+            )
     except (BotoCoreError, ClientError) as e:
+        storage_upload_seconds.observe("error", value=time.perf_counter() - started)
         raise HTTPException(status_code=500, detail=f"S3 upload failed: {str(e)}")
+    storage_upload_seconds.observe("ok", value=time.perf_counter() - started)
 
     return f"{base_url}/{file_name}"
 
@@ -61,17 +72,21 @@ def delete_old_file_from_s3(image_url: str):
     # Extract the S3 object key safely
     parsed_url = urlparse(image_url)
     key = parsed_url.path.lstrip("/")  # removes leading '/'
+    if settings.AWS_S3_ENDPOINT_URL:
+        key = key.removeprefix(f"{settings.AWS_S3_BUCKET}/")
 
     s3 = boto3.client(
         "s3",
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
         # aws_session_token=settings.AWS_SESSION_TOKEN,
-        region_name=settings.AWS_REGION
+        region_name=settings.AWS_REGION,
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
     )
 
     try:
-        s3.delete_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
+        with span("storage.delete", SPAN_KIND_CLIENT, **{"storage.bucket": settings.AWS_S3_BUCKET, "storage.key": key}):
+            s3.delete_object(Bucket=settings.AWS_S3_BUCKET, Key=key)
         print(f"Deleted from S3: {key}")
     except ClientError as e:
         print(f"Failed to delete from S3: {e}")
@@ -33,5 +33,5 @@ if [ "$RUN_MIGRATIONS" = "1" ]; then
   alembic upgrade head
 fi
 
-# Start Uvicorn
-exec uvicorn app.main:app --host 0.0.0.0 --port 80 --workers 1
+# Start Uvicorn: workers sized from the CPUs and the DB connection budget (see app/server.py)
+exec python -m app.server
@@ -0,0 +1,147 @@
+"""
+EXPLAIN regression check for the read endpoints.
+
+Calls each router's list/detail endpoints in-process against the configured (seeded) database,
+captures every SELECT they send, runs EXPLAIN on it with the same parameters and fails when a
+plan falls back to a sequential scan on a table that is big enough for it to matter, or when an
+endpoint doesn't answer with a 2xx (its queries would go unchecked).
+
+Usage (from the project root, after `alembic upgrade head` and seeding):
+    python -m scripts.check_query_plans --min-rows 10000
+"""
+import argparse
+import json
+import sys
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from app.main import app
+from app.database import engine
+from app import models
+from app.auth.oauth import create_access_token
+
+# (actor, path) of the endpoints to check, the actor decides which token is used
+ENDPOINTS = [
+    ("member", "/items/club/{club_id}?limit=100"),
+    ("member", "/items/club/{club_id}?query=a&limit=100"),
+    ("member", "/items/{item_id}"),
+    ("moderator", "/items/clubs/{club_id}/approval?limit=100"),
+    ("moderator", "/clubs/{club_id}/overdue?limit=100"),
+    ("member", "/clubs/{club_id}/members"),
+    ("member", "/clubs/{club_id}/details"),
+    ("member", "/clubs/search?query=a"),
+    ("superuser", "/clubs/"),
+    ("member", "/users/history"),
+    ("member", "/users/clubs"),
+    ("member", "/users/profile"),
+    ("member", "/users/admin/club/{club_id}"),
+    ("member", "/users/moderator/club/{club_id}"),
+]
+
+
+def pick_subjects(conn):
+    """Picks the busiest club and users holding each role in it."""
+    club_id = conn.execute(text(
+        "SELECT club_id FROM items WHERE club_id IS NOT NULL GROUP BY club_id ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    if club_id is None:
+        sys.exit("No items found, seed the database first")
+
+    def member_with_role(role):
+        return conn.execute(text(
+            "SELECT m.user_id FROM memberships m "
+            "LEFT JOIN item_borrowing_requests r ON r.borrower_id = m.user_id "
+            "WHERE m.club_id = :club_id AND m.role = :role "
+            "GROUP BY m.user_id ORDER BY count(r.id) DESC LIMIT 1"
+        ), {"club_id": club_id, "role": role}).scalar()
+
+    return {
+        "club_id": club_id,
+        "item_id": conn.execute(text("SELECT max(id) FROM items WHERE club_id = :club_id"), {"club_id": club_id}).scalar(),
+        "actors": {
+            "member": member_with_role(1),
+            "moderator": member_with_role(2),
+            "superuser": conn.execute(text("SELECT id FROM users WHERE global_role = 1 LIMIT 1")).scalar(),
+        },
+    }
+
+
+def table_sizes(conn):
+    rows = conn.execute(text(
+        "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+    ))
+    return {name: size for name, size in rows}
+
+
+def seq_scans(plan):
+    """Yields the relation of every Seq Scan node in an EXPLAIN (FORMAT JSON) plan."""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from seq_scans(child)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rows", type=int, default=10000, help="Tables smaller than this may be seq scanned")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+        subjects = pick_subjects(conn)
+        sizes = table_sizes(conn)
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    # a server error is reported as a failed endpoint like any other non-2xx
+    client = TestClient(app, raise_server_exceptions=False)
+    failures = []
+    errors = []
+
+    for actor, path in ENDPOINTS:
+        user_id = subjects["actors"][actor]
+        url = path.format(**subjects)
+        if user_id is None:
+            print(f"SKIP {url}: no {actor} in club {subjects['club_id']}")
+            continue
+
+        captured.clear()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            role = models.GlobalRoles.SUPERUSER.value if actor == "superuser" else models.GlobalRoles.USER.value
+            response = client.get(url, headers={"Authorization": f"Bearer {create_access_token(user_id, role)}"})
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        with engine.connect() as conn:
+            for statement, parameters in captured:
+                plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                for relation in seq_scans(plan[0]["Plan"]):
+                    if sizes.get(relation, 0) >= args.min_rows:
+                        failures.append((url, relation, statement))
+
+        print(f"{response.status_code} {url}: {len(captured)} statement(s)")
+        if not response.is_success:
+            errors.append((url, response.status_code, response.text[:200]))
+
+    if errors:
+        print(f"\n{len(errors)} endpoint(s) did not return a 2xx:")
+        for url, status_code, body in errors:
+            print(f"{status_code} {url}: {body}")
+    if failures:
+        print(f"\n{len(failures)} sequential scan(s) on tables with >= {args.min_rows} rows:")
+        for url, relation, statement in failures:
+            print(f"\n{url} -> Seq Scan on {relation} ({sizes[relation]} rows)\n{statement}")
+    if errors or failures:
+        sys.exit(1)
+
+    print("\nNo sequential scans on large tables.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+A local OpenID Connect provider for testing the Google login without Google.
+
+Serves the discovery document, a JWKS, an authorization endpoint that signs in immediately
+(as the user given by ?login_hint=, a fixed test user otherwise) and a token endpoint that
+returns an RS256 ID token with the usual Google profile claims. Point the app at it with
+
+    OIDC_ISSUER=http://localhost:9000 GOOGLE_CLIENT_ID=local-client
+
+and open /auth/?redirect=... as usual. POST /rotate replaces the signing key, to exercise the
+JWKS refresh on an unknown key id.
+
+Usage (from the project root):
+    python -m scripts.fake_oidc --port 9000
+    python -m scripts.fake_oidc --check     # verifies app.auth.oidc against it, then exits
+"""
+import argparse
+import hashlib
+import json
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+ID_TOKEN_LIFETIME = 3600
+JWKS_MAX_AGE = 300
+
+
+class FakeProvider:
+    def __init__(self, issuer: str, client_id: str | None):
+        self.issuer = issuer
+        self.client_id = client_id
+        self.codes: dict[str, dict] = {}
+        self.requests: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.rotate()
+
+    def rotate(self):
+        with self._lock:
+            self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            self.kid = secrets.token_hex(8)
+
+    def jwks(self) -> dict:
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.key.public_key()))
+        return {"keys": [{**jwk, "kid": self.kid, "use": "sig", "alg": "RS256"}]}
+
+    def metadata(self) -> dict:
+        return {
+            "issuer": self.issuer,
+            "authorization_endpoint": f"{self.issuer}/authorize",
+            "token_endpoint": f"{self.issuer}/token",
+            "jwks_uri": f"{self.issuer}/jwks",
+            "response_types_supported": ["code"],
+            "subject_types_supported": ["public"],
+            "id_token_signing_alg_values_supported": ["RS256"],
+        }
+
+    def id_token(self, email: str, audience: str, nonce: str | None = None, **overrides) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": self.issuer,
+            "aud": audience,
+            "sub": hashlib.sha256(email.encode()).hexdigest()[:21],
+            "email": email,
+            "email_verified": True,
+            "name": email.split("@")[0].replace(".", " ").title(),
+            "picture": f"{self.issuer}/avatar/{email}",
+            "iat": now,
+            "exp": now + ID_TOKEN_LIFETIME,
+            **({"nonce": nonce} if nonce else {}),
+            **overrides,
+        }
+        return jwt.encode(claims, self.key, algorithm="RS256", headers={"kid": self.kid})
+
+
+def make_handler(provider: FakeProvider):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _json(self, body: dict, status: int = 200, headers: dict | None = None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            provider.requests[url.path] = provider.requests.get(url.path, 0) + 1
+            query = {name: values[0] for name, values in parse_qs(url.query).items()}
+            if url.path == "/.well-known/openid-configuration":
+                self._json(provider.metadata(), headers={"Cache-Control": "public, max-age=3600"})
+            elif url.path == "/jwks":
+                self._json(provider.jwks(), headers={"Cache-Control": f"public, max-age={JWKS_MAX_AGE}"})
+            elif url.path == "/authorize":
+                code = secrets.token_urlsafe(16)
+                provider.codes[code] = {
+                    "email": query.get("login_hint", "test.user@example.edu"),
+                    "client_id": query.get("client_id"),
+                    "nonce": query.get("nonce"),
+                }
+                self.send_response(302)
+                self.send_header("Location", f"{query['redirect_uri']}?{urlencode({'code': code, 'state': query.get('state', '')})}")
+                self.end_headers()
+            else:
+                self._json({"error": "not_found"}, 404)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            provider.requests[url.path] = provider.requests.get(url.path, 0) + 1
+            length = int(self.headers.get("Content-Length") or 0)
+            form = {name: values[0] for name, values in parse_qs(self.rfile.read(length).decode()).items()}
+            if url.path == "/token":
+                grant = provider.codes.pop(form.get("code", ""), None)
+                if grant is None:
+                    self._json({"error": "invalid_grant"}, 400)
+                    return
+                audience = provider.client_id or grant["client_id"] or form.get("client_id", "")
+                self._json({
+                    "access_token": secrets.token_urlsafe(24),
+                    "token_type": "Bearer",
+                    "expires_in": ID_TOKEN_LIFETIME,
+                    "scope": "openid email profile",
+                    "id_token": provider.id_token(grant["email"], audience, grant["nonce"]),
+                })
+            elif url.path == "/rotate":
+                provider.rotate()
+                self._json({"kid": provider.kid})
+            else:
+                self._json({"error": "not_found"}, 404)
+
+    return Handler
+
+
+def serve(port: int, client_id: str | None) -> tuple[ThreadingHTTPServer, FakeProvider]:
+    issuer = f"http://localhost:{port}"
+    provider = FakeProvider(issuer, client_id)
+    server = ThreadingHTTPServer(("localhost", port), make_handler(provider))
+    return server, provider
+
+
+def check(port: int) -> int:
+    """Runs app.auth.oidc against the fake provider: caching, rotation and rejected tokens."""
+    from app.auth import oidc
+
+    server, provider = serve(port, "local-client")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = oidc.OIDCProvider(provider.issuer, "local-client")
+    failures = []
+
+    def expect(name: str, condition: bool):
+        print(f"{'ok  ' if condition else 'FAIL'} {name}")
+        if not condition:
+            failures.append(name)
+
+    claims = client.verify_id_token(provider.id_token("a@example.edu", "local-client", "n1"), nonce="n1")
+    expect("valid token verifies", claims["email"] == "a@example.edu")
+    for _ in range(50):
+        client.verify_id_token(provider.id_token("a@example.edu", "local-client"))
+    expect("metadata and JWKS fetched once for 51 tokens", provider.requests == {"/.well-known/openid-configuration": 1, "/jwks": 1})
+
+    for name, token, nonce in (
+        ("wrong audience is rejected", provider.id_token("a@example.edu", "other-client"), None),
+        ("wrong nonce is rejected", provider.id_token("a@example.edu", "local-client", "n1"), "n2"),
+        ("expired token is rejected", provider.id_token("a@example.edu", "local-client", exp=int(time.time()) - 600), None),
+        ("wrong issuer is rejected", provider.id_token("a@example.edu", "local-client", iss="https://evil.example"), None),
+    ):
+        try:
+            client.verify_id_token(token, nonce=nonce)
+            expect(name, False)
+        except jwt.InvalidTokenError:
+            expect(name, True)
+
+    provider.rotate()
+    client._jwks.fetched_at -= oidc.JWKS_MIN_REFRESH_SECONDS
+    claims = client.verify_id_token(provider.id_token("b@example.edu", "local-client"))
+    expect("rotated key is picked up", claims["email"] == "b@example.edu" and provider.requests["/jwks"] == 2)
+    try:
+        client.verify_id_token(jwt.encode({"sub": "x"}, provider.key, algorithm="RS256", headers={"kid": "forged"}))
+    except jwt.InvalidTokenError:
+        pass
+    expect("unknown key id right after a refresh does not refetch", provider.requests["/jwks"] == 2)
+
+    server.shutdown()
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--client-id", default=None, help="audience of issued ID tokens (default: the client_id of the authorize request)")
+    parser.add_argument("--check", action="store_true", help="verify app.auth.oidc against the provider and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(check(args.port))
+
+    server, provider = serve(args.port, args.client_id)
+    print(f"Fake OIDC provider at {provider.issuer} (signing key {provider.kid})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+End-to-end HTTP load benchmark.
+
+Runs traffic scenarios modelled on real usage against the app, either in-process through
+httpx's ASGI transport (the default) or against a running server with --base-url. Every
+scenario runs for --duration seconds with --concurrency clients and reports p50/p95/p99
+latency, throughput and SQL statements per request (from the X-DB-Statements header, so a
+server under --base-url needs SQL_STATS_HEADERS=true for that column).
+Results are written as JSON so runs can be compared across commits with --compare.
+
+Scenarios:
+    scan_storm       members borrowing and returning low-risk items by QR code
+    moderator_queue  moderators polling the approval queue
+    item_search      members searching the club catalogue
+    history          members paging through their borrow history
+    image_upload     admins uploading item images (needs AWS_S3_ENDPOINT_URL, e.g. a local MinIO)
+
+Usage (from the project root, against a seeded database, see scripts/seed_data.py):
+    python -m scripts.load_test --duration 30 --concurrency 10
+    python -m scripts.load_test --scenario item_search --compare load-results/<previous>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import httpx
+from sqlalchemy import text
+
+# the in-process app reports its statement counts only with the debug headers on
+os.environ.setdefault("SQL_STATS_HEADERS", "true")
+from app.main import app
+from app.config import settings
+from app.database import engine
+from app.auth.oauth import create_access_token
+from app.middleware.sql_stats import STATEMENTS_HEADER
+
+SEARCH_TERMS = ["camera", "tent", "kit", "lens", "laptop", "a", "pro", "12"]
+# smallest valid PNG, enough for the upload path
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000100ff0f1c3a0000000049454e44ae426082"
+)
+
+def pick_subjects(conn):
+    """Picks the busiest club, its staff, borrowers and items free to scan."""
+    club_id = conn.execute(text(
+        "SELECT club_id FROM items WHERE club_id IS NOT NULL GROUP BY club_id ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    if club_id is None:
+        sys.exit("No items found, seed the database first (python -m scripts.seed_data)")
+
+    def users_with_role(role, limit):
+        return conn.execute(text(
+            "SELECT user_id FROM memberships WHERE club_id = :club_id AND role = :role ORDER BY user_id LIMIT :limit"
+        ), {"club_id": club_id, "role": role, "limit": limit}).scalars().all()
+
+    return {
+        "club_id": club_id,
+        "members": users_with_role(1, 200),
+        "moderators": users_with_role(2, 20),
+        "admins": users_with_role(3, 5),
+        "free_qr_codes": conn.execute(text(
+            "SELECT qr_code FROM items WHERE club_id = :club_id AND status = 'AVAILABLE' AND NOT is_high_risk "
+            "ORDER BY id LIMIT 2000"
+        ), {"club_id": club_id}).scalars().all(),
+        "item_ids": conn.execute(text(
+            "SELECT id FROM items WHERE club_id = :club_id ORDER BY id LIMIT 2000"
+        ), {"club_id": club_id}).scalars().all(),
+    }
+
+
+def auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = []
+
+    async def request(self, client, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status_code = response.status_code
+            statements = response.headers.get(STATEMENTS_HEADER)
+        except httpx.HTTPError:
+            status_code, statements = None, None
+        self.samples.append((time.perf_counter() - started, status_code, int(statements) if statements is not None else None))
+        return status_code
+
+
+async def scan_storm(client, recorder, subjects, worker, rng):
+    # every worker scans its own slice of items, so the storm measures throughput, not conflicts
+    qr_codes = subjects["free_qr_codes"][worker::subjects["concurrency"]]
+    user_id = subjects["members"][worker % len(subjects["members"])]
+    club_id = subjects["club_id"]
+    while qr_codes:
+        for qr_code in qr_codes:
+            yield
+            # borrow and return back to back, so a run never leaves items out
+            if await recorder.request(client, "POST", f"/clubs/{club_id}/borrow", json={"qr_code": qr_code}, headers=auth(user_id)) == 201:
+                await recorder.request(client, "POST", f"/clubs/{club_id}/return", json={"qr_code": qr_code}, headers=auth(user_id))
+
+
+async def moderator_queue(client, recorder, subjects, worker, rng):
+    user_id = subjects["moderators"][worker % len(subjects["moderators"])]
+    while True:
+        yield
+        await recorder.request(client, "GET", f"/items/clubs/{subjects['club_id']}/approval?limit=100", headers=auth(user_id))
+
+
+async def item_search(client, recorder, subjects, worker, rng):
+    user_id = subjects["members"][worker % len(subjects["members"])]
+    while True:
+        yield
+        params = {"query": rng.choice(SEARCH_TERMS), "skip": rng.choice((0, 0, 0, 20, 100)), "limit": rng.choice((10, 20, 100))}
+        await recorder.request(client, "GET", f"/items/club/{subjects['club_id']}", params=params, headers=auth(user_id))
+
+
+async def history(client, recorder, subjects, worker, rng):
+    user_id = subjects["members"][worker % len(subjects["members"])]
+    while True:
+        yield
+        params = {"skip": rng.choice((0, 0, 10, 50)), "limit": 10}
+        await recorder.request(client, "GET", "/users/history", params=params, headers=auth(user_id))
+
+
+async def image_upload(client, recorder, subjects, worker, rng):
+    user_id = subjects["admins"][worker % len(subjects["admins"])]
+    while True:
+        yield
+        item_id = rng.choice(subjects["item_ids"])
+        files = {"files": (f"load-{worker}.png", PNG_BYTES, "image/png")}
+        await recorder.request(
+            client, "POST", f"/clubs/{subjects['club_id']}/items/{item_id}/upload-images", files=files, headers=auth(user_id)
+        )
+
+
+SCENARIOS = {
+    "scan_storm": scan_storm,
+    "moderator_queue": moderator_queue,
+    "item_search": item_search,
+    "history": history,
+    "image_upload": image_upload,
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(round(latency * 1000, 2) for latency, _, _ in samples)
+    statements = [count for _, _, count in samples if count is not None]
+    statuses = {}
+    for _, status_code, _ in samples:
+        statuses[str(status_code)] = statuses.get(str(status_code), 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, status_code, _ in samples if status_code is None or status_code >= 500),
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+        },
+        "statements_per_request": {
+            "mean": round(sum(statements) / len(statements), 2) if statements else None,
+            "max": max(statements) if statements else None,
+        },
+    }
+
+
+async def run_scenario(name, subjects, args):
+    recorder = Recorder()
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        transport, base_url = httpx.ASGITransport(app=app), "http://load-test"
+
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(index):
+        rng = random.Random(args.seed * 1000 + index)
+        steps = SCENARIOS[name](client, recorder, subjects, index, rng)
+        async for _ in steps:
+            if time.perf_counter() >= deadline:
+                break
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(index) for index in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(recorder.samples, elapsed)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, previous):
+    print(f"\nCompared with {previous.get('commit')} ({previous.get('started_at')}):")
+    for name, current in results["scenarios"].items():
+        before = previous.get("scenarios", {}).get(name)
+        if not before or "latency_ms" not in before or "latency_ms" not in current:
+            continue
+        for label, now, then in (
+            ("p95 ms", current["latency_ms"]["p95"], before["latency_ms"]["p95"]),
+            ("rps", current["throughput_rps"], before["throughput_rps"]),
+            ("stmts/req", current["statements_per_request"]["mean"], before["statements_per_request"]["mean"]),
+        ):
+            if now is not None and then:
+                print(f"  {name:<16} {label:<10} {then:>10.2f} -> {now:>10.2f} ({(now - then) / then * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Repeat to pick several, defaults to all")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", help="Load a running server instead of the in-process app")
+    parser.add_argument("--output", type=Path, help="Result file, defaults to load-results/<commit>-<time>.json")
+    parser.add_argument("--compare", type=Path, help="Previous result file to print deltas against")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        subjects = pick_subjects(conn)
+    subjects["concurrency"] = args.concurrency
+
+    started_at = datetime.now(timezone.utc)
+    results = {
+        "commit": git_commit(),
+        "started_at": started_at.isoformat(),
+        "target": args.base_url or "in-process",
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "club_id": subjects["club_id"],
+        "scenarios": {},
+    }
+
+    for name in args.scenario or SCENARIOS:
+        role = {"moderator_queue": "moderators", "image_upload": "admins"}.get(name, "members")
+        if not subjects[role]:
+            results["scenarios"][name] = {"skipped": f"no {role} in club {subjects['club_id']}"}
+        elif name == "image_upload" and not settings.AWS_S3_ENDPOINT_URL:
+            results["scenarios"][name] = {"skipped": "AWS_S3_ENDPOINT_URL is not set, refusing to upload to a real bucket"}
+        else:
+            results["scenarios"][name] = asyncio.run(run_scenario(name, subjects, args))
+
+        summary = results["scenarios"][name]
+        if "skipped" in summary:
+            print(f"{name:<16} skipped: {summary['skipped']}")
+        else:
+            latency = summary["latency_ms"]
+            print(
+                f"{name:<16} {summary['requests']:>7} req {summary['throughput_rps']:>8.1f} rps  "
+                f"p50 {latency['p50'] or 0:>7.1f}  p95 {latency['p95'] or 0:>7.1f}  p99 {latency['p99'] or 0:>7.1f} ms  "
+                f"{summary['statements_per_request']['mean']} stmts/req  {summary['errors']} errors"
+            )
+
+    output = args.output or Path("load-results") / f"{results['commit'] or 'unknown'}-{started_at:%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        print_comparison(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
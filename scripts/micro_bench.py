@@ -0,0 +1,193 @@
+"""
+Micro-benchmarks for the pure-Python helpers that run on every request or write.
+
+Each benchmark times one call with representative input (best of --repeat timeit runs) and is
+compared against a budget in microseconds. Budgets are deliberately loose, a run only fails
+when a change makes a helper several times slower; tighten them once a path has been tuned.
+Database access is replaced by an in-memory session so only the Python side is measured.
+
+Usage (from the project root, no database needed):
+    python -m scripts.micro_bench
+    python -m scripts.micro_bench --only jwt --factor 2 --output micro-results.json
+"""
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+import jwt
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+from app import models, schemas
+from app.config import settings
+from app.auth import claims
+from app.auth.oauth import TokenUser, create_access_token, decode_token
+from app.dependencies import require_club_role
+from app.utils.log import log_operation, safe_log
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+class MemorySession:
+    """Just enough of a Session for the helpers: add/commit and a query returning a fixed row."""
+
+    def __init__(self, row=None):
+        self.row = row
+        self.added = []
+
+    def add(self, instance):
+        self.added.append(instance)
+
+    def commit(self):
+        self.added.clear()
+
+    def query(self, *entities):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return self.row
+
+
+def sample_item(item_id=1):
+    item = models.Item(
+        id=item_id,
+        name=f"Camera {item_id}",
+        description="Mirrorless camera with 24-70mm lens, battery and charger",
+        club_id=7,
+        is_high_risk=True,
+        created_at=NOW,
+        status=models.ItemStatus.AVAILABLE,
+        qr_code=f"QR{item_id:09d}",
+    )
+    item.images = [
+        models.ItemImage(id=item_id * 10 + n, item_id=item_id, image_url=f"https://bucket.s3.amazonaws.com/items/{item_id}-{n}.jpg", created_at=NOW)
+        for n in range(2)
+    ]
+    return item
+
+
+def build_benchmarks():
+    item = sample_item()
+    item_state = dict(item.__dict__)
+    member = models.User(id=42, email="member@example.edu", name="Member", provider_id="p42", provider="google", global_role=models.GlobalRoles.USER.value)
+    membership = models.Membership(user_id=42, club_id=7, role=models.ClubRoles.MODERATOR.value)
+    club = models.Club(id=7, name="Photography Club", description="Cameras", created_at=NOW)
+    moderator_check = require_club_role(role=models.ClubRoles.MODERATOR.value)
+    admin_check = require_club_role(role=models.ClubRoles.ADMIN.value)
+    token = create_access_token(42)
+    # a token with current club claims: the check needs no query at all
+    token_member = TokenUser(42, models.GlobalRoles.USER.value, 3, {"7": models.ClubRoles.MODERATOR.value})
+
+    page = [sample_item(item_id) for item_id in range(1, 101)]
+    pending = [
+        {
+            "transaction_id": n,
+            "item_id": n,
+            "item_name": f"Drill {n}",
+            "borrower_name": f"User {n}",
+            "status": "PENDING_APPROVAL",
+            "requested_at": NOW - timedelta(minutes=n),
+            "message": "Awaiting approval",
+        }
+        for n in range(100)
+    ]
+
+    def role_check_denied():
+        try:
+            admin_check(club_id=7, current_user=member, db=MemorySession(membership), club=club)
+        except Exception:
+            pass
+
+    def role_check_token_claims():
+        # keeps the worker's version cache warm, as between requests of an active user
+        claims._versions[42] = 3
+        return moderator_check(club_id=7, current_user=token_member, db=MemorySession(), club=club)
+
+    def item_search_page():
+        return [
+            schemas.ItemSearchOut(
+                id=row.id,
+                name=row.name,
+                description=row.description,
+                status=row.status.value,
+                is_high_risk=row.is_high_risk,
+                images=[image.image_url for image in row.images],
+            )
+            for row in page
+        ]
+
+    # the 100-item page as it leaves the route: the stdlib path FastAPI takes by default
+    # (re-validate against response_model, dump to dicts, json.dumps) vs the single pass ModelRoute
+    # takes for a model the endpoint already built, and orjson for plain dict payloads
+    page_response = schemas.ItemSearchResponse(message="Successfully retrieved items.", data=item_search_page())
+    page_dicts = TypeAdapter(schemas.ItemSearchResponse).dump_python(page_response, mode="json")
+    response_field = create_model_field("Response", schemas.ItemSearchResponse, mode="serialization")
+
+    def page_render_revalidated():
+        value, _ = response_field.validate(page_response, {}, loc=("response",))
+        return JSONResponse(response_field.serialize(value, by_alias=True)).body
+
+    # (name, callable, budget in microseconds per call)
+    return [
+        ("safe_log.item_state", lambda: safe_log(item_state), 100),
+        ("safe_log.nested_payload", lambda: safe_log({"item_id": 1, "images": [image.image_url for image in item.images], "at": NOW}), 40),
+        ("log_operation.insert", lambda: log_operation(MemorySession(), tablename="items", operation="insert", who_id=42, new_val=item_state), 200),
+        ("log_operation.update", lambda: log_operation(MemorySession(), tablename="items", operation="update", who_id=42, old_val=item_state, new_val=item_state), 300),
+        ("require_club_role.allowed", lambda: moderator_check(club_id=7, current_user=member, db=MemorySession(membership), club=club), 200),
+        ("require_club_role.denied", role_check_denied, 250),
+        ("require_club_role.token_claims", role_check_token_claims, 50),
+        ("jwt.create", lambda: create_access_token(42), 150),
+        ("jwt.decode", lambda: jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]), 100),
+        # decode plus token type and revocation checks, all an access-token request costs
+        ("jwt.decode_access_token", lambda: decode_token(token), 120),
+        ("ItemSearchOut.page_of_100", item_search_page, 3000),
+        ("PendingApprovalOut.page_of_100", lambda: [schemas.PendingApprovalOut(**row) for row in pending], 1000),
+        ("items_page.render_revalidated", page_render_revalidated, 2000),
+        ("items_page.render_single_pass", lambda: page_response.__pydantic_serializer__.to_json(page_response, by_alias=True), 300),
+        ("items_page.render_orjson_dicts", lambda: ORJSONResponse(page_dicts).body, 150),
+        ("items_page.render_stdlib_dicts", lambda: JSONResponse(page_dicts).body, 1000),
+    ]
+
+
+def measure(func, repeat):
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="Run only benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--factor", type=float, default=1.0, help="Scale every budget, e.g. 2 on a slow CI runner")
+    parser.add_argument("--output", help="Write the timings as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    failures = []
+    for name, func, budget in build_benchmarks():
+        if args.only and args.only not in name:
+            continue
+        per_call = measure(func, args.repeat)
+        limit = budget * args.factor
+        results[name] = {"us_per_call": round(per_call, 2), "budget_us": limit}
+        flag = "OK  " if per_call <= limit else "SLOW"
+        if per_call > limit:
+            failures.append(name)
+        print(f"{flag} {name:<32} {per_call:>10.2f} us  (budget {limit:.0f} us)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if failures:
+        print(f"\n{len(failures)} benchmark(s) over budget: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
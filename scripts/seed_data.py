@@ -0,0 +1,296 @@
+"""
+Synthetic data generator for load and performance testing.
+
+Fills the configured database with a realistic, skewed dataset through COPY: a few very popular
+clubs and a long tail of small ones, clubs with very different high-risk item ratios, power
+borrowers, and multi-year borrow histories ending in a mix of returned, open, overdue and
+pending-approval loans. The output only depends on --seed, --scale and --anchor, so every
+performance run can be pointed at a comparable dataset.
+
+At --scale 1 it writes about 1,000 clubs, 50,000 users, 500,000 items and 10M transactions.
+
+Usage (from the project root, after `alembic upgrade head`):
+    python -m scripts.seed_data --scale 0.01 --seed 42 --truncate
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from app.database import engine
+
+# rows at --scale 1
+BASE_CLUBS = 1000
+BASE_USERS = 50000
+BASE_ITEMS = 500000
+# average loans per item before the club activity multiplier, two transactions per loan
+MEAN_LOANS_PER_ITEM = 10
+HISTORY_DAYS = 730
+SUPERUSERS = 5
+
+TABLES = [
+    "idempotency_keys",
+    "overdue_loans",
+    "job_checkpoints",
+    "logging",
+    "item_borrowing_transactions",
+    "item_borrowing_requests",
+    "item_images",
+    "items",
+    "memberships",
+    "clubs",
+    "users",
+]
+
+WORDS = [
+    "Robotics", "Chess", "Photography", "Hiking", "Drama", "Astronomy", "Film", "Debate", "Climbing",
+    "Music", "Cycling", "Gaming", "Esports", "Chemistry", "Coding", "Sailing", "Dance", "Art", "Books", "Radio",
+]
+ITEM_KINDS = [
+    "Camera", "Tripod", "Laptop", "Projector", "Tent", "Drill", "Microphone", "Speaker", "Telescope",
+    "Board", "Kit", "Helmet", "Rope", "Lens", "Controller", "Cable", "Sleeping Bag", "Stove", "Bike", "Guitar",
+]
+
+
+class Plan:
+    """Club level parameters, drawn once from the seed and shared by every pass."""
+
+    def __init__(self, seed: int, scale: float):
+        rng = random.Random(seed)
+        self.seed = seed
+        self.clubs = max(1, round(BASE_CLUBS * scale))
+        self.users = max(SUPERUSERS + 10, round(BASE_USERS * scale))
+        self.items = max(self.clubs, round(BASE_ITEMS * scale))
+
+        # zipf-like popularity: a handful of clubs own most items and members
+        popularity = [1 / (rank + 1) ** 1.1 for rank in range(self.clubs)]
+        rng.shuffle(popularity)
+        total = sum(popularity)
+        self.popularity = [weight / total for weight in popularity]
+        # most clubs lend little risky gear, some (labs, workshops) mostly risky gear
+        self.high_risk_ratio = [rng.betavariate(0.6, 4) for _ in range(self.clubs)]
+        # how busy the club's items are relative to the average
+        self.activity = [rng.lognormvariate(0, 0.8) for _ in range(self.clubs)]
+
+        # item -> club, contiguous ranges so items of a club are inserted together
+        self.item_club = []
+        for club_index, weight in enumerate(self.popularity):
+            self.item_club.extend([club_index + 1] * max(1, round(weight * self.items)))
+        self.item_club = self.item_club[:self.items]
+        while len(self.item_club) < self.items:
+            self.item_club.append(rng.randint(1, self.clubs))
+
+        self.members, self.moderators, self.memberships = self._memberships(rng)
+
+    def _memberships(self, rng):
+        members = {club_id: [] for club_id in range(1, self.clubs + 1)}
+        moderators = {club_id: [] for club_id in range(1, self.clubs + 1)}
+        memberships = []
+        club_ids = list(range(1, self.clubs + 1))
+
+        for user_id in range(SUPERUSERS + 1, self.users + 1):
+            count = min(self.clubs, 1 + int(rng.expovariate(1 / 1.5)))
+            for club_id in set(rng.choices(club_ids, weights=self.popularity, k=count)):
+                members[club_id].append(user_id)
+
+        for club_id in club_ids:
+            # every club gets an admin and a few moderators, even if nobody picked it
+            if len(members[club_id]) < 3:
+                members[club_id].extend(rng.sample(range(SUPERUSERS + 1, self.users + 1), 3))
+                members[club_id] = list(dict.fromkeys(members[club_id]))
+            staff = max(2, len(members[club_id]) // 50)
+            for position, user_id in enumerate(members[club_id]):
+                role = 3 if position == 0 else 2 if position <= staff else 1
+                if role == 2:
+                    moderators[club_id].append(user_id)
+                memberships.append((user_id, club_id, role))
+            # only plain members borrow, the first ones borrow the most
+            members[club_id] = members[club_id][staff + 1:] or members[club_id]
+
+        return members, moderators, memberships
+
+    def loans(self, item_id: int, anchor: datetime):
+        """Deterministic borrow history of one item, oldest first."""
+        rng = random.Random(self.seed * 1_000_003 + item_id)
+        club_id = self.item_club[item_id - 1]
+        high_risk = rng.random() < self.high_risk_ratio[club_id - 1]
+        borrowers = self.members[club_id]
+        operators = self.moderators[club_id]
+        mean_gap = HISTORY_DAYS / (MEAN_LOANS_PER_ITEM * self.activity[club_id - 1])
+
+        loans = []
+        start = anchor - timedelta(days=HISTORY_DAYS) + timedelta(days=rng.expovariate(1 / mean_gap))
+        while start < anchor:
+            borrower = borrowers[int(len(borrowers) * rng.random() ** 2.5)]
+            operator = rng.choice(operators) if operators else None
+            return_date = start + timedelta(days=7)
+            duration = timedelta(days=rng.uniform(0.5, 12))
+            loan = {
+                "borrower_id": borrower,
+                "created_at": start,
+                "return_date": return_date,
+                "borrow_status": "APPROVED",
+                "borrow_operator": operator if high_risk else None,
+                "returned_at": start + duration,
+                "return_status": "COMPLETED",
+                "return_operator": operator if high_risk else None,
+            }
+
+            if loan["returned_at"] >= anchor:
+                # still out: recent high risk borrows may wait for approval
+                loan["returned_at"] = None
+                loan["return_status"] = None
+                if high_risk and rng.random() < 0.3:
+                    loan["borrow_status"] = "PENDING_APPROVAL"
+                    loan["borrow_operator"] = None
+                loans.append(loan)
+                break
+
+            if high_risk:
+                roll = rng.random()
+                if roll < 0.02:
+                    # damaged on return, the item is never lent again
+                    loan["return_status"] = "REJECTED"
+                    loans.append(loan)
+                    break
+                if roll < 0.1 and start > anchor - timedelta(days=21):
+                    loan["return_status"] = "PENDING_CONDITION_CHECK"
+                    loan["return_operator"] = None
+                    loans.append(loan)
+                    break
+
+            loans.append(loan)
+            start = loan["returned_at"] + timedelta(days=rng.expovariate(1 / mean_gap))
+
+        return high_risk, loans
+
+
+def copy_rows(cursor, table: str, columns: list[str], rows):
+    count = 0
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    print(f"  {table}: {count} rows")
+
+
+def users(plan: Plan, anchor: datetime):
+    rng = random.Random(plan.seed + 1)
+    for user_id in range(1, plan.users + 1):
+        created_at = anchor - timedelta(days=HISTORY_DAYS + rng.uniform(0, 365))
+        role = 1 if user_id <= SUPERUSERS else 0
+        yield (user_id, f"user{user_id}@example.edu", f"User {user_id}", created_at, f"seed-{user_id}", "seed", None, role)
+
+
+def clubs(plan: Plan, anchor: datetime):
+    rng = random.Random(plan.seed + 2)
+    for club_id in range(1, plan.clubs + 1):
+        name = f"{rng.choice(WORDS)} Club {club_id:04d}"
+        created_at = anchor - timedelta(days=HISTORY_DAYS + rng.uniform(0, 365))
+        yield (club_id, name, f"Seeded {name.lower()}", created_at, None)
+
+
+def memberships(plan: Plan, anchor: datetime):
+    for user_id, club_id, role in plan.memberships:
+        yield (user_id, club_id, role, anchor - timedelta(days=HISTORY_DAYS))
+
+
+def items(plan: Plan, anchor: datetime):
+    for item_id in range(1, plan.items + 1):
+        rng = random.Random(plan.seed * 7 + item_id)
+        high_risk, loans = plan.loans(item_id, anchor)
+        last = loans[-1] if loans else None
+        available = last is None or last["return_status"] == "COMPLETED"
+        name = f"{rng.choice(ITEM_KINDS)} {item_id}"
+        yield (
+            item_id,
+            name,
+            f"Seeded {name.lower()}",
+            plan.item_club[item_id - 1],
+            high_risk,
+            anchor - timedelta(days=HISTORY_DAYS + rng.uniform(0, 30)),
+            "AVAILABLE" if available else "UNAVAILABLE",
+            f"QR{item_id:09d}",
+        )
+
+
+def item_images(plan: Plan, anchor: datetime):
+    rng = random.Random(plan.seed + 3)
+    image_id = 0
+    for item_id in range(1, plan.items + 1):
+        for _ in range(rng.choice((0, 1, 1, 2, 3))):
+            image_id += 1
+            yield (image_id, item_id, f"https://example-bucket.s3.amazonaws.com/items/seed-{image_id}.jpg", anchor - timedelta(days=HISTORY_DAYS))
+
+
+def borrowing_requests(plan: Plan, anchor: datetime):
+    request_id = 0
+    for item_id in range(1, plan.items + 1):
+        for loan in plan.loans(item_id, anchor)[1]:
+            request_id += 1
+            yield (request_id, item_id, loan["borrower_id"], loan["return_date"], loan["created_at"], loan["returned_at"])
+
+
+def borrowing_transactions(plan: Plan, anchor: datetime):
+    request_id = 0
+    transaction_id = 0
+    for item_id in range(1, plan.items + 1):
+        for loan in plan.loans(item_id, anchor)[1]:
+            request_id += 1
+            transaction_id += 1
+            yield (transaction_id, request_id, loan["created_at"], loan["borrow_operator"], loan["borrow_status"], None)
+            if loan["return_status"]:
+                transaction_id += 1
+                remarks = "Item returned by user" if loan["return_operator"] is None else "Condition checked"
+                yield (transaction_id, request_id, loan["returned_at"], loan["return_operator"], loan["return_status"], remarks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=0.01, help="1.0 = 1,000 clubs / 500k items / ~10M transactions")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--anchor",
+        type=lambda value: datetime.fromisoformat(value).replace(tzinfo=timezone.utc),
+        default=datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0),
+        help="'Now' of the generated history (YYYY-MM-DD), defaults to today",
+    )
+    parser.add_argument("--truncate", action="store_true", help="Empty the tables before seeding")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    plan = Plan(args.seed, args.scale)
+    print(f"Seeding {plan.clubs} clubs, {plan.users} users, {plan.items} items (seed={args.seed}, anchor={args.anchor.date()})")
+
+    raw = engine.raw_connection()
+    try:
+        with raw.driver_connection.cursor() as cursor:
+            if args.truncate:
+                cursor.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+            elif cursor.execute("SELECT EXISTS (SELECT 1 FROM items)").fetchone()[0]:
+                sys.exit("The database already has items, rerun with --truncate to replace them")
+
+            copy_rows(cursor, "users", ["id", "email", "name", "created_at", "provider_id", "provider", "picture", "global_role"], users(plan, args.anchor))
+            copy_rows(cursor, "clubs", ["id", "name", "description", "created_at", "image_path"], clubs(plan, args.anchor))
+            copy_rows(cursor, "memberships", ["user_id", "club_id", "role", "joined_at"], memberships(plan, args.anchor))
+            copy_rows(cursor, "items", ["id", "name", "description", "club_id", "is_high_risk", "created_at", "status", "qr_code"], items(plan, args.anchor))
+            copy_rows(cursor, "item_images", ["id", "item_id", "image_url", "created_at"], item_images(plan, args.anchor))
+            copy_rows(cursor, "item_borrowing_requests", ["id", "item_id", "borrower_id", "return_date", "created_at", "returned_at"], borrowing_requests(plan, args.anchor))
+            copy_rows(cursor, "item_borrowing_transactions", ["id", "item_borrowing_request_id", "processed_at", "operator_id", "status", "remarks"], borrowing_transactions(plan, args.anchor))
+
+            # explicit ids were copied, move the sequences past them
+            for table in ("users", "clubs", "items", "item_images", "item_borrowing_requests", "item_borrowing_transactions"):
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT max(id) FROM {table}), 1))")
+        raw.commit()
+    finally:
+        raw.close()
+
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()